@@ -3,6 +3,8 @@ from iconservice import *
 TAG = 'FakeSystemContract'
 TERM_LENGTH = 43120
 FIRST_TERM = TERM_LENGTH
+# PREP_ADDRESS of LiquidICX, which joins without delegations are delegated to
+DEFAULT_PREP = Address.from_string("hx487a43ade1479b6e7aa3d6f898a721b8ba9a4ccc")
 
 
 class Delegation(TypedDict):
@@ -11,6 +13,7 @@ class Delegation(TypedDict):
 
 
 class FakeSystemContract(IconScoreBase):
+
     @eventlog
     def IScoreClaimed(self, iscore: int, icx: int):
         pass
@@ -39,7 +42,13 @@ class FakeSystemContract(IconScoreBase):
         self._unstakeLockPeriod = VarDB("unstakeLockPeriod", db, value_type=int)
 
         self._stake = VarDB('stake', db, value_type=int)
+        # total delegated, and the delegations of the last setDelegation call
         self._delegation = VarDB('delegation', db, value_type=int)
+        self._delegation_addresses = ArrayDB('delegation_addresses', db, value_type=Address)
+        self._delegation_values = ArrayDB('delegation_values', db, value_type=int)
+
+        self._main_preps = ArrayDB('main_preps', db, value_type=Address)
+        self._sub_preps = ArrayDB('sub_preps', db, value_type=Address)
 
         self._i_score = VarDB('i_score', db, value_type=int)
 
@@ -48,6 +57,7 @@ class FakeSystemContract(IconScoreBase):
         self._termStartHeight.set(FIRST_TERM)
         self._blockHeight.set(FIRST_TERM)
         self._unstakeLockPeriod.set(FIRST_TERM * 8)
+        self._main_preps.put(DEFAULT_PREP)
 
     def on_update(self) -> None:
         super().on_update()
@@ -62,12 +72,23 @@ class FakeSystemContract(IconScoreBase):
 
     @external
     def setDelegation(self, delegations: List[Delegation] = None) -> None:
-        delegation = delegations[0]
-        self._delegation.set(delegation["value"])
+        while self._delegation_addresses:
+            self._delegation_addresses.pop()
+            self._delegation_values.pop()
+
+        total = 0
+        for delegation in delegations or []:
+            self._delegation_addresses.put(delegation["address"])
+            self._delegation_values.put(delegation["value"])
+            total += delegation["value"]
+        self._delegation.set(total)
 
     @external(readonly=True)
     def getDelegation(self, address: Address) -> dict:
-        return {"totalDelegated": self._delegation.get()}
+        delegations = []
+        for prep, value in zip(self._delegation_addresses, self._delegation_values):
+            delegations.append({"address": prep, "value": value})
+        return {"totalDelegated": self._delegation.get(), "delegations": delegations}
 
     @external
     def claimIScore(self) -> None:
@@ -116,13 +137,18 @@ class FakeSystemContract(IconScoreBase):
     def getPReps(self, startRanking: int = None, endRanking: int = None) -> list:
         return []
 
+    @external
+    def registerPRep(self, _address: Address, _main: bool = True) -> None:
+        (self._main_preps if _main else self._sub_preps).put(_address)
+        self.PRepRegistered(_address)
+
     @external(readonly=True)
     def getMainPReps(self) -> dict:
-        return {}
+        return {"preps": [{"address": address} for address in self._main_preps]}
 
     @external(readonly=True)
     def getSubPReps(self) -> dict:
-        return {}
+        return {"preps": [{"address": address} for address in self._sub_preps]}
 
     @external(readonly=True)
     def getPRepTerm(self) -> dict:
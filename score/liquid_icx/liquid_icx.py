@@ -3,10 +3,16 @@ import iconservice
 from .scorelib.pausable import whenPaused, whenNotPaused
 from .scorelib.consts import *
 from .wallet import Wallet
+from .packed_wallet import PackedWallet
 from .interfaces.irc_2_interface import *
 from .interfaces.token_fallback_interface import TokenFallbackInterface
 from .scorelib.linked_list import *
+from .scorelib.indexed_set import *
+from .scorelib.prep_registry import *
+from .scorelib.packing import *
 from .scorelib.utils import *
+from .scorelib.step_meter import *
+from .scorelib.profiling import *
 
 
 class LiquidICX(IconScoreBase, IRC2TokenStandard):
@@ -37,41 +43,90 @@ class LiquidICX(IconScoreBase, IRC2TokenStandard):
     def Vote(self, _from: Address):
         pass
 
+    @eventlog(indexed=1)
+    def Profile(self, _method: str, _reads: int, _writes: int, _bytes_written: int, _calls: int, _steps: int):
+        pass
+
     # ================================================
     #  Initialization
     # ================================================
     def __init__(self, db: IconScoreDatabase) -> None:
         super().__init__(db)
+        # Storage operations and inter-SCORE calls are metered, so distribute can stop before running out of steps
+        self._step_meter = StepMeter()
+        db = MeteredDatabase(db, self._step_meter)
+        self._db = db
+
         # IRC2 Standard variables
         self._total_supply = VarDB('total_supply', db, value_type=int)
         self._decimals = VarDB('decimals', db, value_type=int)
         self._balances = DictDB('balances', db, value_type=int)
+        # Balance, unstaking amount and reward index of each wallet with LICX in one record, so balanceOf
+        # reads a single entry. It is written by _saveWallet, wallets of the previous version by migrateWallets.
+        self._balance_records = DictDB('balance_records', db, value_type=bytes)
 
         # LICX variables
-        self._wallets = LinkedListDB("wallets", db, str)
+        # Nodes of the wallets are stored as one record each, nodes written before as address strings
+        # are packed on their next change or by migrateWallets
+        self._wallets = LinkedListDB("wallets", db, Address, packed=True, legacy_value_type=str)
+        # Wallets with unresolved join or leave requests, which have to be visited by distribute
+        # They are split into shards by address
+        self._pending_wallets = LinkedListDB("pending_wallets", db, Address, packed=True)
+        self._pending_shards = {0: self._pending_wallets}
+        self._shard_count = VarDB("shard_count", db, int)
+        self._migration_cursor = VarDB("migration_cursor", db, int)
 
         self._min_value_to_get_rewards = VarDB("min_value_to_get_rewards", db, int)
 
         self._rewards = VarDB("rewards", db, int)
+        self._reward_index = VarDB("reward_index", db, int)
+        # Rewards, which are staked, but not yet credited to the delegations of the wallets, as they are settled lazily.
+        # They are delegated proportionally to the SCORE's delegations.
+        self._unsettled_rewards = VarDB("unsettled_rewards", db, int)
         self._new_unlocked_total = VarDB("new_unlocked_total", db, int)
         self._total_unstake_in_term = VarDB("total_unstake_in_term", db, int)
 
         self._last_distributed_height = VarDB("last_distributed_height", db, int)
 
+        # Distribute cursor of shard 0, the cursors of the other shards are stored in _shard_cursors
         self._current_distribute_linked_list_id = VarDB("current_distribute_linked_list_id", db, int)
+        self._shard_cursors = DictDB("shard_cursors", db, int)
+        # Number of pending wallets of the current distribute cycle, the ones processed since it started
+        # and the estimated steps spent on them
+        self._distribute_wallet_total = VarDB("distribute_wallet_total", db, int)
+        self._distribute_wallet_processed = VarDB("distribute_wallet_processed", db, int)
+        self._distribute_wallet_steps = VarDB("distribute_wallet_steps", db, int)
         self._iteration_limit = VarDB("iteration_limit", db, int)
+        self._step_budget = VarDB("step_budget", db, int)
 
         self._distributing = VarDB("distributing", db, bool)
 
         self._cap = VarDB("cap", db, int)
 
         self._delegation = DictDB("delegation", db, int)
-        self._delegation_keys = ArrayDB("delegation_keys", db, Address)
+        self._delegation_keys = IndexedSetDB("delegation_keys", db, Address)
+        # Main and sub P-Reps, which users can delegate to
+        self._prep_registry = PRepRegistry(db)
+
+        # Hash of the delegations sent to the System SCORE the last time, to skip sending the same delegations again
+        self._delegation_hash = VarDB("delegation_hash", db, bytes)
+        # setDelegation calls sent and skipped, counted while profiling is enabled
+        self._delegation_calls_sent = VarDB("delegation_calls_sent", db, int)
+        self._delegation_calls_skipped = VarDB("delegation_calls_skipped", db, int)
+        # Basis points of each P-Rep in the delegations sent the last time, used to delegate proportionally to the SCORE
+        self._delegation_template = VarDB("delegation_template", db, bytes)
 
         self._is_paused = VarDB("is_paused", db, bool)
 
+        # Wallets are stored as one record each, once the owner switched to the packed layout
+        self._packed_wallets = VarDB("packed_wallets_enabled", db, bool)
+
+        # Storage operations and inter-SCORE calls per external method, once enabled by the owner
+        self._profiler = Profiler(db)
+
         # System SCORE
-        self._system_score = IconScoreBase.create_interface_score(SYSTEM_SCORE, InterfaceSystemScore)
+        self._system_score = MeteredScore(IconScoreBase.create_interface_score(SYSTEM_SCORE, InterfaceSystemScore),
+                                          self._step_meter)
 
     def on_install(self, _decimals: int = 18) -> None:
         super().on_install()
@@ -87,12 +142,31 @@ class LiquidICX(IconScoreBase, IRC2TokenStandard):
 
         self._min_value_to_get_rewards.set(10 * 10 ** _decimals)
         self._iteration_limit.set(500)
+        self._reward_index.set(REWARD_INDEX_PRECISION)
+        self._migration_cursor.set(-1)
 
         self._cap.set(1000 * 10 ** _decimals)
 
     def on_update(self) -> None:
         super().on_update()
 
+        # the cursor of a cycle in progress is a node of the wallets, but a position in the pending wallets after the
+        # update. The cycle has to be finished with the previous version, before the SCORE can be updated
+        if self._distributing.get():
+            revert("LiquidICX: Can not update while distributing, finish the distribute cycle first.")
+
+        if not self._reward_index.get():
+            self._reward_index.set(REWARD_INDEX_PRECISION)
+
+        # wallets stored by the previous version are migrated with migrateWallets, which starts at cursor 0.
+        # The cursor is -1 once they are migrated, so later updates do not migrate them again
+        if not self._migration_cursor.get() and not len(self._wallets):
+            self._migration_cursor.set(-1)
+
+        # the delegation keys were stored as a plain ArrayDB before
+        self._delegation_keys.reindex()
+        self._prep_registry.reindex()
+
     # ================================================
     #  External methods
     # ================================================
@@ -114,15 +188,39 @@ class LiquidICX(IconScoreBase, IRC2TokenStandard):
 
     @external(readonly=True)
     def balanceOf(self, _owner: Address) -> int:
-        return self._balances[_owner] - Wallet(self.db, _owner).unstaking
+        record = self._balance_records[_owner]
+        if record is None:
+            if not self._balances[_owner]:
+                return 0
+            # wallet was not saved since the balance records were introduced
+            return self._balanceOf(self._getWallet(_owner))
+
+        # the current reward index is read as well, the min value to get rewards only if the index grew since the
+        # rewards of the wallet were settled, see _rewardsSince
+        reader = PackReader(record)
+        balance = reader.read_int()
+        unstaking = reader.read_int()
+        reward_index = reader.read_int()
+        return balance + self._rewardsSince(balance, reward_index, self._reward_index.get()) - unstaking
 
     @external(readonly=True)
     def lockedOf(self, _owner: Address) -> int:
-        return Wallet(self.db, _owner).locked
+        return self._getWallet(_owner).locked
 
     @external(readonly=True)
     def getWallet(self, _address: Address) -> dict:
-        return Wallet(self.db, _address).serialize()
+        wallet = self._getWallet(_address)
+        result = wallet.serialize()
+
+        # show the delegations as they will be, once the pending rewards are settled
+        rewards = self._pendingRewards(wallet)
+        if rewards:
+            balance = self._balances[_address]
+            result["delegation_values"] = [
+                value + Utils.calcValueProportionalToBasisPoint(rewards, Utils.calcBPS(value, balance))
+                for value in result["delegation_values"]
+            ]
+        return result
 
     @external(readonly=True)
     def getWallets(self) -> list:
@@ -131,6 +229,109 @@ class LiquidICX(IconScoreBase, IRC2TokenStandard):
             result.append(item[1])
         return result
 
+    @external(readonly=True)
+    def getWalletsPage(self, _cursor: int = 0, _limit: int = MAX_ITERATION_LOOP, _details: bool = False) -> dict:
+        """
+        Return up to _limit wallets, starting at the node ID _cursor or at the first wallet if _cursor is 0.
+        "next" is the node ID to pass as _cursor for the following page, 0 if there are no more wallets.
+        :param _details: if True, each wallet is returned with its balance, locked and unstaking amount
+        """
+
+        if not 0 < _limit <= MAX_ITERATION_LOOP:
+            revert(f"LiquidICX: Limit has to be between 1 and {MAX_ITERATION_LOOP}.")
+
+        try:
+            items, next_id = self._wallets.page(_cursor, _limit)
+        except LinkedNodeNotFound:
+            revert("LiquidICX: Invalid cursor.")
+        wallets = []
+        for _, address in items:
+            if _details:
+                wallet = self._getWallet(address)
+                wallets.append({
+                    "address": address,
+                    "balance": self._balanceOf(wallet),
+                    "locked": wallet.locked,
+                    "unstaking": wallet.unstaking
+                })
+            else:
+                wallets.append(address)
+
+        return {"wallets": wallets, "next": next_id}
+
+    @external(readonly=True)
+    def getPendingWallets(self) -> list:
+        result = []
+        for shard in range(self.getShardCount()):
+            for item in self._pendingShard(shard):
+                result.append(item[1])
+        return result
+
+    @external(readonly=True)
+    def getDistributionState(self) -> dict:
+        """
+        Return the progress of the current distribute cycle, or of the last one, if no cycle is running.
+        "remaining" is the number of pending wallets still to process, "estimated_calls" the number of
+        distribute calls needed for them. With a step budget, it is based on the average steps per wallet
+        processed in this cycle, otherwise and before any wallet is processed on the iteration limit.
+        """
+
+        shard_count = self.getShardCount()
+        distributing = self._distributing.get()
+        processed = self._distribute_wallet_processed.get()
+        if distributing:
+            remaining = max(self._distribute_wallet_total.get() - processed, 0)
+        else:
+            remaining = sum(len(self._pendingShard(shard)) for shard in range(shard_count))
+
+        wallets_per_call = self._iteration_limit.get()
+        step_budget = self._step_budget.get()
+        wallet_steps = self._distribute_wallet_steps.get()
+        if step_budget and processed and wallet_steps:
+            wallets_per_call = max(step_budget // max(wallet_steps // processed, 1), 1)
+
+        return {
+            "distributing": distributing,
+            "cursor": self._current_distribute_linked_list_id.get(),
+            "shard_cursors": [self._getShardCursor(shard) for shard in range(shard_count)],
+            "processed": processed,
+            "remaining": remaining,
+            "rewards": self._rewards.get(),
+            "new_unlocked_total": self._new_unlocked_total.get(),
+            "total_unstake_in_term": self._total_unstake_in_term.get(),
+            "estimated_calls": max((remaining + wallets_per_call - 1) // wallets_per_call, 1)
+        }
+
+    @external(readonly=True)
+    def getProfile(self) -> dict:
+        """
+        Return the summed up storage operations and inter-SCORE calls of each profiled external method,
+        recorded while profiling was enabled. "steps" is their estimated step cost.
+        """
+
+        return self._profiler.table()
+
+    @external(readonly=True)
+    def getDelegationCallStats(self) -> dict:
+        """
+        Return the number of setDelegation calls sent to the System SCORE and the ones skipped, as the delegations
+        did not change. They are only counted while profiling is enabled.
+        """
+
+        return {"sent": self._delegation_calls_sent.get(), "skipped": self._delegation_calls_skipped.get()}
+
+    @external(readonly=True)
+    def isProfiling(self) -> bool:
+        return self._profiler.enabled
+
+    @external(readonly=True)
+    def getShardCount(self) -> int:
+        return max(self._shard_count.get(), 1)
+
+    @external(readonly=True)
+    def isPackedWallets(self) -> bool:
+        return self._packed_wallets.get()
+
     @external(readonly=True)
     def getStaked(self) -> int:
         return self._system_score.getStake(self.address)["stake"]
@@ -139,14 +340,26 @@ class LiquidICX(IconScoreBase, IRC2TokenStandard):
     def rewards(self) -> int:
         return self._rewards.get()
 
+    @external(readonly=True)
+    def getRewardIndex(self) -> int:
+        return self._reward_index.get()
+
     @external(readonly=True)
     def getDelegation(self) -> dict:
         return self._system_score.getDelegation(self.address)
 
+    @external(readonly=True)
+    def getPReps(self) -> list:
+        return list(self._prep_registry)
+
     @external(readonly=True)
     def getIterationLimit(self) -> int:
         return self._iteration_limit.get()
 
+    @external(readonly=True)
+    def getStepBudget(self) -> int:
+        return self._step_budget.get()
+
     @external(readonly=True)
     def getMinValueToGetRewards(self) -> int:
         return self._min_value_to_get_rewards.get()
@@ -167,6 +380,31 @@ class LiquidICX(IconScoreBase, IRC2TokenStandard):
     def newUnlockedTotal(self) -> int:
         return self._new_unlocked_total.get()
 
+    @external(readonly=True)
+    def multicall(self, _calls: str) -> list:
+        """
+        Execute several readonly calls against the same state and return their results in the same order.
+        :param _calls: JSON list of calls, e.g. [{"method": "balanceOf", "params": {"_owner": "hx..."}}].
+        Only the methods in MULTICALL_METHODS can be called.
+        """
+
+        calls = json_loads(_calls)
+        if not isinstance(calls, list):
+            revert("LiquidICX: Calls have to be a list.")
+        if len(calls) > MAX_ITERATION_LOOP:
+            revert(f"LiquidICX: Multicall cannot execute more than {MAX_ITERATION_LOOP} calls.")
+
+        results = []
+        for i, call in enumerate(calls):
+            # the error of a call is reverted with the index of the call
+            try:
+                results.append(self._multicallOne(call))
+            except IconScoreException as e:
+                revert(f"multicall[{i}]: {e.message}")
+
+        return results
+
+    @profiled
     @whenNotPaused
     @external
     def pause(self):
@@ -175,6 +413,7 @@ class LiquidICX(IconScoreBase, IRC2TokenStandard):
         self._is_paused.set(True)
         Logger.info(f"Pausing: {self._is_paused.get()}")
 
+    @profiled
     @whenPaused
     @external
     def unPause(self):
@@ -183,6 +422,7 @@ class LiquidICX(IconScoreBase, IRC2TokenStandard):
         self._is_paused.set(False)
         Logger.info(f"Unpausing: {self._is_paused.get()}")
 
+    @profiled
     @external
     def setIterationLimit(self, _iteration_limit: int) -> None:
         """
@@ -197,6 +437,45 @@ class LiquidICX(IconScoreBase, IRC2TokenStandard):
 
         self._iteration_limit.set(_iteration_limit)
 
+    @profiled
+    @external
+    def setStepBudget(self, _step_budget: int) -> None:
+        """
+        Sets the estimated steps a distribute call may spend, before it stops and continues with the next call.
+        The iteration limit is used instead, when the step budget is 0.
+        :param _step_budget: Number of steps, or 0
+        """
+
+        if self.msg.sender != self.owner:
+            revert("LiquidICX: Only owner function at current state.")
+        if _step_budget < 0:
+            revert("LiquidICX: 'step budget' has to be >= 0.")
+
+        self._step_budget.set(_step_budget)
+
+    @profiled
+    @external
+    def setShardCount(self, _shard_count: int) -> None:
+        """
+        Sets the number of shards the pending wallets are split into. Each shard can be distributed by its own
+        distribute calls, so several callers can work on the same term in parallel.
+        Shards can only be removed, if they have no pending wallets.
+        :param _shard_count: Number of shards, between 1 and MAX_DISTRIBUTE_SHARDS
+        """
+
+        if self.msg.sender != self.owner:
+            revert("LiquidICX: Only owner function at current state.")
+        if not 0 < _shard_count <= MAX_DISTRIBUTE_SHARDS:
+            revert(f"LiquidICX: 'shard count' has to be between 1 and {MAX_DISTRIBUTE_SHARDS}.")
+        if self._distributing.get():
+            revert("LiquidICX: Can not change the shard count while distribute cycle.")
+        for shard in range(_shard_count, self.getShardCount()):
+            if len(self._pendingShard(shard)):
+                revert(f"LiquidICX: Shard {shard} still has pending wallets.")
+
+        self._shard_count.set(_shard_count)
+
+    @profiled
     @external
     def setMinValueToGetRewards(self, _value: int) -> None:
         """
@@ -211,6 +490,7 @@ class LiquidICX(IconScoreBase, IRC2TokenStandard):
 
         self._min_value_to_get_rewards.set(_value)
 
+    @profiled
     @external
     def setCap(self, _value: int):
         """
@@ -222,6 +502,84 @@ class LiquidICX(IconScoreBase, IRC2TokenStandard):
             revert("LiquidICX: Only owner function at current state.")
         self._cap.set(_value * 10 ** self._decimals.get())
 
+    @profiled
+    @external
+    def setProfiling(self, _enabled: bool) -> None:
+        """
+        Enables or disables profiling. While enabled, each profiled external method emits a Profile event
+        and adds its storage operations and inter-SCORE calls to the counters returned by getProfile.
+        The setDelegation calls, which are sent and skipped, are counted for getDelegationCallStats.
+        Enabling profiling clears the previous counters.
+        :param _enabled: True to enable profiling
+        """
+
+        if self.msg.sender != self.owner:
+            revert("LiquidICX: Only owner function at current state.")
+
+        if _enabled and not self._profiler.enabled:
+            self._profiler.clear()
+            self._delegation_calls_sent.remove()
+            self._delegation_calls_skipped.remove()
+        self._profiler.enabled = _enabled
+
+    @profiled
+    @external
+    def enablePackedWallets(self) -> None:
+        """
+        Switches to the packed wallet layout, which stores each wallet as one record.
+        Wallets are moved to the new layout, when they are written the next time. This can not be undone.
+        """
+
+        if self.msg.sender != self.owner:
+            revert("LiquidICX: Only owner function at current state.")
+        if self._packed_wallets.get():
+            revert("LiquidICX: Packed wallets are already enabled.")
+
+        self._packed_wallets.set(True)
+
+    @profiled
+    @external
+    def migrateWallets(self, _limit: int) -> None:
+        """
+        Migrates the wallets stored by a previous version of the SCORE:
+            * the node of the wallet is packed into one record with the raw address
+            * the wallet is added to the pending wallets, if it has unresolved join or leave requests
+            * the wallet is moved to the packed layout, if it is enabled
+            * the balance record of the wallet, which balanceOf reads, is written
+        Only needed once after the update from the previous version. Has to be called multiple times until all
+        wallets are migrated, distribute can not be called before.
+        :param _limit: Max number of wallets to migrate with this call
+        """
+
+        if self.msg.sender != self.owner:
+            revert("LiquidICX: Only owner function at current state.")
+        if _limit <= 0:
+            revert("LiquidICX: 'limit' has to be > 0.")
+
+        cursor = self._migration_cursor.get()
+        if cursor < 0:
+            revert("LiquidICX: All wallets are already migrated.")
+        if not cursor:
+            if not len(self._wallets):
+                self._migration_cursor.set(-1)
+                return
+            cursor = self._wallets.get_head_node().id
+
+        for _ in range(_limit):
+            self._wallets.pack_node(cursor)
+            wallet = self._getWallet(self._wallets.node_value(cursor))
+            if wallet.hasPendingRequests():
+                wallet.addToPendingWallets(self)
+            self._saveWallet(wallet)
+            try:
+                cursor = self._wallets.next(cursor)
+            except StopIteration:
+                cursor = -1
+                break
+
+        self._migration_cursor.set(cursor)
+
+    @profiled
     @whenNotPaused
     @payable
     @external
@@ -241,6 +599,50 @@ class LiquidICX(IconScoreBase, IRC2TokenStandard):
 
         self._join(self.msg.sender, self.msg.value, json_loads(_delegation))
 
+    @profiled
+    @whenNotPaused
+    @payable
+    @external
+    def joinBatch(self, _entries: str):
+        """
+        External entry point to join the LICX pool with several wallets and one payment, e.g. for custodians.
+        The ICX is staked and delegated once for all wallets.
+        :param _entries: JSON list of wallets to join, e.g. [{"address": "hx...", "amount": "0x..."}].
+        "delegation" can be passed per wallet in the format of join, as a JSON string or an object.
+        The amounts have to add up to the ICX sent.
+        """
+
+        entries = json_loads(_entries)
+        if not isinstance(entries, list) or not entries:
+            revert("LiquidICX: Entries have to be a non empty list.")
+        if len(entries) > MAX_ITERATION_LOOP:
+            revert(f"LiquidICX: Cannot join more than {MAX_ITERATION_LOOP} wallets at once.")
+
+        staked = self.getStaked()
+        if self._cap.get() <= staked + self.msg.value:
+            revert("LiquidICX: Currently impossible to join the pool")
+
+        joined = []
+        for entry in entries:
+            if not isinstance(entry, dict):
+                revert("LiquidICX: Invalid entry.")
+            address = self._convertJsonParam(entry.get("address"), Address)
+            amount = self._convertJsonParam(entry.get("amount"), int)
+            if amount < self._min_value_to_get_rewards.get():
+                revert("LiquidICX: Joining value cannot be less than the minimum join value")
+
+            self._joinWallet(address, amount, self._convertJsonDelegation(entry.get("delegation")))
+            joined.append((address, amount))
+
+        if sum(amount for _, amount in joined) != self.msg.value:
+            revert("LiquidICX: Entry amounts do not match to the amount of ICX sent.")
+
+        self._system_score.setStake(staked + self.msg.value)
+        self._delegate()
+        for address, amount in joined:
+            self.Join(address, amount)
+
+    @profiled
     @whenNotPaused
     @external
     def transfer(self, _to: Address, _value: int, _data: bytes = None) -> None:
@@ -263,6 +665,43 @@ class LiquidICX(IconScoreBase, IRC2TokenStandard):
 
         self._transfer(self.msg.sender, _to, _value, _data)
 
+    @profiled
+    @whenNotPaused
+    @external
+    def transferBatch(self, _recipients: str, _data: bytes = None) -> None:
+        """
+        External entry function to send LICX from one wallet to several others in one transaction
+        :param _recipients: JSON list of recipients, e.g. [{"address": "hx...", "value": "0x..."}]
+        :param _data: Optional information for the transfer Events
+        """
+
+        if self._distributing.get():
+            revert("LiquidICX: Can not transfer while distribute cycle.")
+
+        entries = json_loads(_recipients)
+        if not isinstance(entries, list) or not entries:
+            revert("LiquidICX: Recipients have to be a non empty list.")
+        if len(entries) > MAX_ITERATION_LOOP:
+            revert(f"LiquidICX: Cannot transfer to more than {MAX_ITERATION_LOOP} recipients at once.")
+
+        recipients = []
+        for entry in entries:
+            if not isinstance(entry, dict):
+                revert("LiquidICX: Invalid recipient.")
+            address = self._convertJsonParam(entry.get("address"), Address)
+            value = self._convertJsonParam(entry.get("value"), int)
+            if value < 0:
+                revert("LiquidICX: Transferring value cannot be less than zero.")
+            if address == ZERO_WALLET_ADDRESS:
+                revert("LiquidICX: Can not transfer LICX to zero wallet address.")
+            recipients.append((address, value))
+
+        if _data is None:
+            _data = b'None'
+
+        self._transferToMany(self.msg.sender, recipients, _data)
+
+    @profiled
     @whenNotPaused
     @external
     def leave(self, _value: int = None):
@@ -271,11 +710,9 @@ class LiquidICX(IconScoreBase, IRC2TokenStandard):
         :param _value: amount of LICX to convert back to ICX
         """
 
-        if _value is None:
-            _value = self._balances[self.msg.sender]
-
         self._leave(self.msg.sender, _value)
 
+    @profiled
     @whenNotPaused
     @external
     def claim(self):
@@ -283,13 +720,17 @@ class LiquidICX(IconScoreBase, IRC2TokenStandard):
         External entry point to claim ICX
         """
 
-        wallet = Wallet(self.db, self.msg.sender)
-        claim_amount = wallet.claim()
+        wallet = self._getWallet(self.msg.sender)
+        claim_amount = wallet.claim(self)
+        self._saveWallet(wallet)
 
         if claim_amount:
+            # an ICX transfer costs the steps of an inter-SCORE call
+            self._step_meter.call()
             self.icx.transfer(self.msg.sender, claim_amount)
             self.Claim()
 
+    @profiled
     @whenNotPaused
     @external
     def vote(self, _delegation: str):
@@ -303,19 +744,43 @@ class LiquidICX(IconScoreBase, IRC2TokenStandard):
 
         self._vote(self.msg.sender, delegation)
 
+    @profiled
+    @external
+    def refreshPReps(self) -> None:
+        """
+        Updates the P-Reps, which users can delegate to. Can be called by anyone once per term,
+        otherwise the P-Reps are refreshed by distribute.
+        """
+
+        if not self._refreshPRepsIfOutdated(self._system_score.getPRepTerm()):
+            revert("LiquidICX: P-Reps were already refreshed this term.")
+
+    @profiled
     @whenNotPaused
     @external
-    def distribute(self):
+    def distribute(self, _shard: int = 0):
         """
         External entry point to execute the distribute process
+        :param _shard: Shard of the pending wallets to process, see setShardCount
         """
 
-        if not len(self._wallets):
+        self._step_meter.reset()
+        # the wallets may all have left during a cycle in progress, which is closed by the next call nevertheless
+        distributing = self._distributing.get()
+        if not distributing and not len(self._wallets):
             revert("LiquidICX: No wallets joined yet.")
-        if self._last_distributed_height.get() >= self._system_score.getPRepTerm()["startBlockHeight"]:
+        if self._migration_cursor.get() >= 0:
+            # wallets with open requests are only added to the pending wallets by migrateWallets
+            revert("LiquidICX: Wallets have to be migrated first, see migrateWallets.")
+        if not 0 <= _shard < self.getShardCount():
+            revert("LiquidICX: Invalid shard.")
+        term = self._system_score.getPRepTerm()
+        if self._last_distributed_height.get() >= term["startBlockHeight"]:
             revert("LiquidICX: Distribute was already called this term.")
 
-        self._distribute()
+        if not distributing:
+            self._refreshPRepsIfOutdated(term)
+        self._distribute(_shard)
 
     @payable
     def fallback(self):
@@ -339,34 +804,48 @@ class LiquidICX(IconScoreBase, IRC2TokenStandard):
         :param delegation: preps, that user wants delegate to ( key -> prep_address, value -> delegation amount)
         """
 
+        self._joinWallet(_sender, _amount, _delegation)
+        self._system_score.setStake(self.getStaked() + _amount)
+        self._delegate()
+        self.Join(_sender, _amount)
+
+    def _joinWallet(self, _address: Address, _amount: int, _delegation: dict) -> None:
+        """
+        Add the join request and the delegations of a wallet, without staking and delegating the ICX.
+        """
+
         # Create wallet object and append to linked list if first time joining
-        wallet = Wallet(self.db, _sender)
+        wallet = self._getWallet(_address)
         if not wallet.exists():
-            wallet.node_id = self._wallets.append(str(_sender))
+            wallet.node_id = self._wallets.append(_address)
 
         if _delegation is None:
             _delegation = self._getDelegationDictProportionalToSCORE(_amount)
 
         wallet.join(_amount, _delegation, self)
-        self._system_score.setStake(self.getStaked() + _amount)
-        self._delegate()
-        self.Join(_sender, _amount)
+        self._saveWallet(wallet)
 
     def _leave(self, _sender: Address, _value: int):
         """
         Internal method, which adds a leave request to a specific address.
         Requests are then later resolved in distribute cycle, once per term.
         :param sender: Address, which is requesting leave.
-        :param _value: Amount of LICX for a leave request
+        :param _value: Amount of LICX for a leave request, the whole balance if None
         """
 
+        wallet = self._getWallet(_sender)
+        self._settleRewards(wallet)
+
+        if _value is None:
+            _value = self._balances[_sender]
+
         if _value < self._min_value_to_get_rewards.get():
             revert(f"LiquidICX: Leaving value cannot be less than {self._min_value_to_get_rewards.get()}.")
         if self._balances[_sender] < _value:
             revert("LiquidICX: Out of balance.")
 
-        wallet = Wallet(self.db, _sender)
-        wallet.requestLeave(_value)
+        wallet.requestLeave(_value, self)
+        self._saveWallet(wallet)
 
         self.LeaveRequest(_sender, _value)
 
@@ -380,15 +859,17 @@ class LiquidICX(IconScoreBase, IRC2TokenStandard):
         :param delegation: new delegations dictionary
         """
 
-        wallet = Wallet(self.db, _sender)
+        wallet = self._getWallet(_sender)
         if not wallet.hasVotingPower():
             revert("LiquidICX: You do not have any voting power.")
 
+        self._settleRewards(wallet)
         sum_undelegated = self._removeDelegations(wallet)
         sum_delegated = self._addAbsoluteDelegations(wallet, _delegations)
 
         if sum_undelegated != sum_delegated:
             revert("LiquidICX: New total delegation should match with the previous total delegation.")
+        self._saveWallet(wallet)
 
         self._system_score.setStake(sum_delegated)
         self._delegate()
@@ -403,58 +884,126 @@ class LiquidICX(IconScoreBase, IRC2TokenStandard):
         :param _data: Optional data for Event
         """
 
-        sender = Wallet(self.db, _from)
-        receiver = Wallet(self.db, _to)
+        self._transferToMany(_from, [(_to, _value)], _data)
+
+    def _transferToMany(self, _from: Address, _recipients: list, _data: bytes):
+        """
+        Send LICX from one wallet to several others.
+        The sender's delegations are reduced once by the sum of all values and the SCORE delegates once.
+        :param _from: Sender's wallet
+        :param _recipients: (recipient's address, LICX value) pairs
+        :param _data: Optional data for the Events
+        """
+
+        sender = self._getWallet(_from)
+        self._settleRewards(sender)
 
         # Checks the sending value and balance.
-        if self._balances[_from] - sender.unstaking < _value:
+        total_value = sum(value for _, value in _recipients)
+        if self._balances[_from] - sender.unstaking < total_value:
             revert("LiquidICX: Out of balance.")
 
-        sender.subtractDelegationsProportionallyToWallet(self, _value)
+        sender.subtractDelegationsProportionallyToWallet(self, total_value)
 
-        self._balances[_from] = self._balances[_from] - _value
+        self._balances[_from] = self._balances[_from] - total_value
         self._remove_wallet_if_not_enough_funds(sender)
 
-        # receiver has already voting power, add to existing one, otherwise proportionally divide between all
-        # delegated preps
-        if receiver.hasVotingPower():
-            self._addDelegationsProportionallyToWallet(receiver, _value)
-        else:
-            self._addDelegationsProportionallyToSCORE(receiver, _value)
+        # a packed wallet must not be loaded twice, when sending to itself or to the same recipient again
+        wallets = {_from: sender}
+        for address, value in _recipients:
+            receiver = wallets.get(address)
+            if receiver is None:
+                receiver = wallets[address] = self._getWallet(address)
+                self._settleRewards(receiver)
+
+            # receiver has already voting power, add to existing one, otherwise proportionally divide between all
+            # delegated preps
+            if receiver.hasVotingPower():
+                self._addDelegationsProportionallyToWallet(receiver, value)
+            else:
+                self._addDelegationsProportionallyToSCORE(receiver, value)
+
+            self._balances[address] = self._balances[address] + value
+            self._add_wallet_if_enough_funds(receiver)
 
-        self._balances[_to] = self._balances[_to] + _value
-        self._add_wallet_if_enough_funds(receiver)
+        for wallet in wallets.values():
+            self._saveWallet(wallet)
 
-        if _to.is_contract:
-            recipient_score = self.create_interface_score(_to, TokenFallbackInterface)
-            recipient_score.tokenFallback(_from, _value, _data)
+        for address, value in _recipients:
+            if address.is_contract:
+                recipient_score = MeteredScore(self.create_interface_score(address, TokenFallbackInterface),
+                                               self._step_meter)
+                recipient_score.tokenFallback(_from, value, _data)
 
         self._delegate()
-        self.Transfer(_from, _to, _value, _data)
+        for address, value in _recipients:
+            self.Transfer(_from, address, value, _data)
 
-    def _distribute(self):
+    def _distribute(self, _shard: int = 0):
         """
-        Distribute I-Score rewards once per term.
-        Iterate over all wallets >= self._min_value_to_get_rewards and give them their reward share.
-
-        When the last wallet in the linked list is being processed, the summed up values are being used to redelegate and to
-        update the total_supply of LICX. After that all the variables used are being reset (set to default state).
-        This function has to be called multiple times until we iterated over all wallets >= self._min_value_to_get_rewards.
+        Resolve join and leave requests once per term.
+        The I-Score rewards are claimed with the first call of a term and are credited to the wallets lazily
+        through the reward index, so this function only iterates over the pending wallets to resolve their queues.
+        One call only processes the pending wallets of one shard.
+
+        When the last wallet of the last unfinished shard is being processed, the summed up values are being used
+        to redelegate and to update the total_supply of LICX. After that all the variables used are being reset
+        (set to default state). This function has to be called multiple times until we iterated over all wallets.
+
+        Without a step budget, one call processes up to self._iteration_limit wallets.
+        With a step budget, one call processes wallets as long as the estimated steps spent so far, plus the most
+        expensive wallet of this call, stay within the budget. At least one wallet is processed per call.
         """
 
-        self._distributionSetup()
+        cycle_started = self._distributionSetup()
+
+        current_linked_list_id = self._getShardCursor(_shard)
+        if current_linked_list_id < 0 and not cycle_started and not self._allShardsDistributed():
+            revert("LiquidICX: Shard was already distributed this term.")
 
-        current_linked_list_id = self._current_distribute_linked_list_id.get()
+        pending_wallets = self._pendingShard(_shard)
+        step_budget = self._step_budget.get()
+        max_wallet_steps = 0
+        wallet_steps_total = 0
         i = 0
+
+        # totals and delegation changes of this call are summed up in memory and written once after the loop
+        unlocked_total = 0
+        unstake_total = 0
+        settled_total = 0
+        delegation_deltas = {}
+
         # current_linked_list_id becomes negative when we reached the end of the linked list
-        while i < self._iteration_limit.get() and current_linked_list_id >= 0:
-            self._distributeOneWallet(current_linked_list_id)
-            current_linked_list_id = self._getNextLinkedListId(current_linked_list_id)
+        while current_linked_list_id >= 0:
+            if step_budget:
+                if i > 0 and self._step_meter.steps + max_wallet_steps > step_budget:
+                    break
+            elif i >= self._iteration_limit.get():
+                break
+
+            steps = self._step_meter.steps
+            wallet = self._getWallet(pending_wallets.node_value(current_linked_list_id))
+            unlocked, unstake, settled = self._distributeOneWallet(wallet, delegation_deltas)
+            unlocked_total += unlocked
+            unstake_total += unstake
+            settled_total += settled
+            current_linked_list_id = self._getNextLinkedListId(pending_wallets, current_linked_list_id, wallet)
+            self._saveWallet(wallet)
+            wallet_steps = self._step_meter.steps - steps
+            max_wallet_steps = max(max_wallet_steps, wallet_steps)
+            wallet_steps_total += wallet_steps
             i += 1
 
-        if current_linked_list_id >= 0:
-            self._current_distribute_linked_list_id.set(current_linked_list_id)
-        else:
+        self._flushDistributeBatch(unlocked_total, unstake_total, settled_total, delegation_deltas)
+        if i:
+            self._distribute_wallet_processed.set(self._distribute_wallet_processed.get() + i)
+            self._distribute_wallet_steps.set(self._distribute_wallet_steps.get() + wallet_steps_total)
+
+        # the cursor is stored as -1, once the shard is done. The cycle is closed by the call, which finishes
+        # the last shard, or by the next call, if this one is out of steps
+        self._setShardCursor(_shard, current_linked_list_id)
+        if current_linked_list_id < 0 and self._allShardsDistributed() and \
+                not (step_budget and i > 0 and self._step_meter.steps + STEP_RESERVE_END_DISTRIBUTION > step_budget):
             self._redelegate()
             self._endDistribution()
 
@@ -465,13 +1014,48 @@ class LiquidICX(IconScoreBase, IRC2TokenStandard):
     def _claimRewards(self):
         """
         Claim IScore rewards. It is called only once per term, at the start of the cycle.
+        The reward index grows by the rewards per LICX of this term, which settles the rewards of all wallets at once.
+        The rewards are delegated as unsettled rewards, until the wallets credit them to their own delegations.
         """
 
-        self._rewards.set(0)
-        self._rewards.set(self._system_score.queryIScore(self.address)["estimatedICX"])
+        rewards = self._system_score.queryIScore(self.address)["estimatedICX"]
+        self._rewards.set(rewards)
         self._system_score.claimIScore()
         self._distributing.set(True)
 
+        if not rewards:
+            return
+        self._unsettled_rewards.set(self._unsettled_rewards.get() + rewards)
+        total_supply = self._total_supply.get()
+        if total_supply:
+            self._reward_index.set(self._reward_index.get() * (total_supply + rewards) // total_supply)
+
+    def _isPrep(self, _address: Address) -> bool:
+        """
+        Checks if the given address is either a sub or main prep.
+        The P-Reps are only queried from the System SCORE, if the term they were refreshed in ended.
+        """
+
+        if self._prep_registry.isOutdated(self.block_height):
+            self._refreshPRepsIfOutdated(self._system_score.getPRepTerm())
+        return _address in self._prep_registry
+
+    def _refreshPRepsIfOutdated(self, _term: dict) -> bool:
+        """
+        Refresh the P-Reps, if they were not refreshed in the given term of getPRepTerm.
+        At most MAX_PREP_COUNT main and sub P-Reps are kept.
+        Return True, if they were refreshed
+        """
+
+        if not self._prep_registry.isOutdated(self.block_height, _term["startBlockHeight"]):
+            return False
+
+        prep_list: list = self._system_score.getMainPReps()["preps"]
+        prep_list.extend(self._system_score.getSubPReps()["preps"])
+        self._prep_registry.refresh([prep["address"] for prep in prep_list[:MAX_PREP_COUNT]], self.block_height,
+                                    _term["endBlockHeight"])
+        return True
+
     def _redelegate(self):
         """
         Re-stake and re-delegate with the rewards claimed at the start of the cycle.
@@ -497,7 +1081,8 @@ class LiquidICX(IconScoreBase, IRC2TokenStandard):
         self._rewards.set(0)
         self._new_unlocked_total.set(0)
         self._total_unstake_in_term.set(0)
-        self._current_distribute_linked_list_id.set(0)
+        for shard in range(self.getShardCount()):
+            self._setShardCursor(shard, 0)
         self._last_distributed_height.set(self._system_score.getPRepTerm()["startBlockHeight"])
         self._distributing.set(False)
         self.Distribute(self.block_height)
@@ -505,82 +1090,380 @@ class LiquidICX(IconScoreBase, IRC2TokenStandard):
     def _delegate(self):
         """
         Iterates through internal delegation dictionary, builds up delegation list and delegates.
-        :param stake: If true the function stakes new value, which is the sum of all delegations.
+        The System SCORE is only called, if the delegations differ from the ones sent the last time.
         """
 
         delegations = []
-        stake_sum = 0
+        writer = PackWriter()
+        total_delegated = 0
 
         for address in self._delegation_keys:
+            value = self._delegation[address]
             delegations.append({
                 "address": address,
-                "value": self._delegation[address]
+                "value": value
             })
-            stake_sum += self._delegation[address]
+            total_delegated += value
+
+        # the unsettled rewards are added proportionally, the rounding remainder goes to the first P-Rep
+        unsettled_rewards = self._unsettled_rewards.get()
+        if unsettled_rewards and total_delegated > 0:
+            remainder = unsettled_rewards
+            for it in delegations:
+                value = unsettled_rewards * it["value"] // total_delegated
+                it["value"] += value
+                remainder -= value
+            delegations[0]["value"] += remainder
+            total_delegated += unsettled_rewards
+
+        for it in delegations:
+            writer.write_address(it["address"]).write_int(it["value"])
+
+        delegation_hash = sha3_256(writer.to_bytes())
+        if delegation_hash == self._delegation_hash.get():
+            # the P-Reps changed and changed back within one transaction
+            if self._delegation_template.get() is None:
+                self._delegation_template.set(self._buildDelegationTemplate(delegations, total_delegated))
+            self._countDelegationCall(self._delegation_calls_skipped)
+            return
 
         self._system_score.setDelegation(delegations)
+        self._delegation_hash.set(delegation_hash)
+        self._delegation_template.set(self._buildDelegationTemplate(delegations, total_delegated))
+        self._countDelegationCall(self._delegation_calls_sent)
 
-    def _calculateWalletRewards(self, _wallet: Wallet, _address: Address) -> int:
-        wallet_balance = self._balances[_address]
+    def _countDelegationCall(self, _counter: VarDB):
+        """
+        Increment a counter of getDelegationCallStats. Nothing is written, as long as profiling is not enabled.
+        """
 
-        if wallet_balance >= self._min_value_to_get_rewards.get() and self._total_supply.get():
+        if self._profiler.enabled:
+            _counter.set(_counter.get() + 1)
 
-            wallet_rewards = int(wallet_balance / self._total_supply.get() * self._rewards.get())
-            _wallet.calcDistributeDelegations(wallet_rewards, wallet_balance, self._delegation)
+    @staticmethod
+    def _buildDelegationTemplate(_delegations: list, _total_delegated: int) -> bytes:
+        """
+        Return the basis point of each P-Rep in the given delegations, packed into one record
+        """
 
-            return wallet_rewards
-        else:
+        writer = PackWriter()
+        if _total_delegated > 0:
+            for it in _delegations:
+                writer.write_address(it["address"]).write_int(Utils.calcBPS(it["value"], _total_delegated))
+        return writer.to_bytes()
+
+    def _getWallet(self, _address: Address) -> Wallet:
+        """
+        Return the wallet of an address in the current storage layout.
+        Changes have to be written with self._saveWallet(wallet).
+        """
+
+        if self._packed_wallets.get():
+            return PackedWallet(self._db, _address)
+        return Wallet(self._db, _address)
+
+    def _multicallOne(self, _call):
+        """
+        Execute one call of multicall, see MULTICALL_METHODS
+        """
+
+        method = _call.get("method") if isinstance(_call, dict) else None
+        if method not in MULTICALL_METHODS:
+            revert(f"LiquidICX: Method {method} cannot be called through multicall.")
+
+        params = _call.get("params", {})
+        param_types = MULTICALL_METHODS[method]
+        if not isinstance(params, dict) or set(params) != set(param_types):
+            revert(f"LiquidICX: Invalid params for {method}.")
+
+        kwargs = {}
+        for name, value in params.items():
+            kwargs[name] = self._convertJsonParam(value, param_types[name])
+        try:
+            return getattr(self, method)(**kwargs)
+        except LinkedNodeNotFound:
+            revert(f"LiquidICX: Node ID of {method} not found.")
+
+    @staticmethod
+    def _convertJsonParam(_value, _type: type):
+        """
+        Convert a JSON value into an Address or an int, which may also be passed as a hex or decimal string
+        """
+
+        if _type == Address:
+            # Address.from_string raises an exception, which is not reverted with a message
+            if not isinstance(_value, str) or len(_value) != 42 or _value[:2] not in ("hx", "cx") \
+                    or any(c not in "0123456789abcdef" for c in _value[2:]):
+                revert(f"LiquidICX: Invalid param {_value}.")
+            return Address.from_string(_value)
+        if isinstance(_value, int):
+            return _value
+        try:
+            return int(_value, 0)
+        except (TypeError, ValueError):
+            revert(f"LiquidICX: Invalid param {_value}.")
+
+    @staticmethod
+    def _convertJsonDelegation(_delegation) -> dict:
+        """
+        Convert the delegation of a JSON entry, which may be passed as a JSON string or an object, into the format of
+        join. Its values are converted like the other params, see _convertJsonParam.
+        """
+
+        if _delegation is None:
+            return None
+        if isinstance(_delegation, str):
+            try:
+                _delegation = json_loads(_delegation)
+            except ValueError:
+                revert("LiquidICX: Invalid delegation.")
+        if not isinstance(_delegation, dict):
+            revert("LiquidICX: Invalid delegation.")
+        return {prep: LiquidICX._convertJsonParam(value, int) for prep, value in _delegation.items()}
+
+    def _saveWallet(self, _wallet: Wallet):
+        """
+        Write the changes of a wallet and update its balance record.
+        Has to be called after the balance, the unstaking amount or the reward index of a wallet changed.
+        The reward index of a wallet without balance is removed, so the wallet is deleted once it is empty.
+        """
+
+        address = _wallet.address
+        balance = self._balances[address]
+        if not balance:
+            _wallet.reward_index = 0
+        _wallet.save()
+
+        unstaking = _wallet.unstaking
+        if balance or unstaking:
+            record = PackWriter().write_int(balance).write_int(unstaking).write_int(_wallet.reward_index).to_bytes()
+            if record != self._balance_records[address]:
+                self._balance_records[address] = record
+        elif self._balance_records[address] is not None:
+            del self._balance_records[address]
+
+    def _balanceOf(self, _wallet: Wallet) -> int:
+        """
+        Return the LICX balance of a wallet including its pending rewards and excluding its leave requests
+        """
+
+        return self._balances[_wallet.address] + self._pendingRewards(_wallet) - _wallet.unstaking
+
+    def _pendingRewards(self, _wallet: Wallet) -> int:
+        """
+        Return the LICX rewards a wallet earned since its rewards were settled the last time.
+        Wallets below self._min_value_to_get_rewards do not earn rewards.
+        """
+
+        return self._rewardsSince(self._balances[_wallet.address], _wallet.reward_index, self._reward_index.get())
+
+    def _rewardsSince(self, _balance: int, _last_index: int, _current_index: int) -> int:
+        """
+        Return the LICX rewards a balance earned while the reward index grew from _last_index to _current_index.
+        A wallet without reward index was not settled since the update to the reward index, which started at
+        REWARD_INDEX_PRECISION, so its balance earned the rewards since then.
+        """
+
+        if not _last_index:
+            _last_index = REWARD_INDEX_PRECISION
+        if _last_index >= _current_index:
+            return 0
+        if _balance < self._min_value_to_get_rewards.get():
             return 0
 
-    def _distributionSetup(self):
-        if not self._rewards.get():
-            self._claimRewards()
-            self._current_distribute_linked_list_id.set(
-                self._wallets.get_head_node().id)  # get head id for start iteration
+        return _balance * _current_index // _last_index - _balance
 
-    def _distributeOneWallet(self, _linked_list_id) -> None:
+    def _settleRewards(self, _wallet: Wallet, _delegation_deltas: dict = None) -> int:
+        """
+        Credit the pending rewards to a wallet and its delegations and move it to the current reward index.
+        Has to be called before the balance of a wallet changes.
+        :param _delegation_deltas: if passed, the changes of the SCORE's delegations are summed up in it and
+        the unsettled rewards are not reduced, see _flushDistributeBatch
+        :return: Sum of the delegations added to the wallet
+        """
+
+        current_index = self._reward_index.get()
+        if _wallet.reward_index == current_index:
+            return 0
+
+        settled = 0
+        rewards = self._pendingRewards(_wallet)
+        if rewards:
+            balance = self._balances[_wallet.address]
+            settled = _wallet.calcDistributeDelegations(rewards, balance, self, _delegation_deltas)
+            self._balances[_wallet.address] = balance + rewards
+            if _delegation_deltas is None:
+                self._reduceUnsettledRewards(settled)
+
+        _wallet.reward_index = current_index
+        return settled
+
+    def _reduceUnsettledRewards(self, _settled: int):
+        if _settled:
+            self._unsettled_rewards.set(max(self._unsettled_rewards.get() - _settled, 0))
+
+    def _distributionSetup(self) -> bool:
+        """
+        Start the distribute cycle of a term, if it was not started yet.
+        Return True, if it was started by this call
+        """
+
+        if self._distributing.get():
+            return False
+
+        self._claimRewards()
+        wallet_total = 0
+        for shard in range(self.getShardCount()):
+            pending_wallets = self._pendingShard(shard)
+            if len(pending_wallets):
+                self._setShardCursor(shard, pending_wallets.get_head_node().id)  # get head id for start iteration
+                wallet_total += len(pending_wallets)
+            else:
+                self._setShardCursor(shard, -1)
+
+        self._distribute_wallet_total.set(wallet_total)
+        self._distribute_wallet_processed.set(0)
+        self._distribute_wallet_steps.set(0)
+        return True
+
+    def _pendingShard(self, _shard: int) -> LinkedListDB:
+        """
+        Return the linked list of the pending wallets of a shard
+        """
+
+        if _shard not in self._pending_shards:
+            self._pending_shards[_shard] = LinkedListDB(f"pending_wallets_{_shard}", self._db, Address, packed=True)
+        return self._pending_shards[_shard]
+
+    def _addPendingWallet(self, _address: Address) -> int:
+        """
+        Append a wallet to the pending wallets of its shard and return its node ID.
+        A wallet, which is appended to a shard the running distribute cycle did not finish yet, is processed
+        in this cycle and is added to its total.
         """
-        Perform the distribution steps for the wallet with the ID of _linked_list_id.
-        First reward calculation is done.
+
+        shard = _address.to_bytes()[-1] % self.getShardCount()
+        node_id = self._pendingShard(shard).append(_address)
+        if self._distributing.get() and self._getShardCursor(shard) >= 0:
+            self._distribute_wallet_total.set(self._distribute_wallet_total.get() + 1)
+        return node_id
+
+    def _getShardCursor(self, _shard: int) -> int:
+        if not _shard:
+            return self._current_distribute_linked_list_id.get()
+        return self._shard_cursors[_shard]
+
+    def _setShardCursor(self, _shard: int, _cursor: int):
+        if not _shard:
+            self._current_distribute_linked_list_id.set(_cursor)
+        elif _cursor:
+            self._shard_cursors[_shard] = _cursor
+        else:
+            del self._shard_cursors[_shard]
+
+    def _allShardsDistributed(self) -> bool:
+        """
+        Return True, if all wallets of all shards were processed in the current distribute cycle
+        """
+
+        for shard in range(self.getShardCount()):
+            if self._getShardCursor(shard) >= 0:
+                return False
+        return True
+
+    def _distributeOneWallet(self, _wallet: Wallet, _delegation_deltas: dict) -> tuple:
+        """
+        Perform the distribution steps for a pending wallet.
+        First the pending rewards are settled.
         Then join and leave queues are being resolved.
-        Rewards, unlocked and leave values are then being used to update wallet's balance and are added to:
-            * new_unlocked_total
-            * total_unstake_in_term
+        Unlocked and leave values are then being used to update wallet's balance.
+        The changes of the SCORE's delegations are summed up in _delegation_deltas.
+        Return the unlocked and the leave value and the settled rewards, which are added to new_unlocked_total,
+        total_unstake_in_term and subtracted from the unsettled rewards by _flushDistributeBatch.
         """
 
-        address = Address.from_string(self._wallets.node_value(_linked_list_id))
-        wallet = Wallet(self.db, address)
+        address = _wallet.address
+        settled = self._settleRewards(_wallet, _delegation_deltas)
+        wallet_unlocked_licx = _wallet.unlock(self)
+        wallet_leave_licx = _wallet.leave(self, _delegation_deltas)
 
-        wallet_reward_licx = self._calculateWalletRewards(wallet, address)
-        wallet_unlocked_licx = wallet.unlock()
-        wallet_leave_licx = wallet.leave(self)
+        if wallet_unlocked_licx or wallet_leave_licx:
+            self._balances[address] = self._balances[address] + wallet_unlocked_licx - wallet_leave_licx
 
-        self._balances[address] = self._balances[address] + \
-                                  wallet_unlocked_licx + \
-                                  wallet_reward_licx - \
-                                  wallet_leave_licx
+        return wallet_unlocked_licx, wallet_leave_licx, settled
+
+    def _flushDistributeBatch(self, _unlocked: int, _unstake: int, _settled: int, _delegation_deltas: dict):
+        """
+        Write the values summed up by one distribute call to new_unlocked_total, total_unstake_in_term,
+        the unsettled rewards and the SCORE's delegations.
+        """
+
+        if _unlocked:
+            self._new_unlocked_total.set(self._new_unlocked_total.get() + _unlocked)
+        if _unstake:
+            self._total_unstake_in_term.set(self._total_unstake_in_term.get() + _unstake)
+        self._reduceUnsettledRewards(_settled)
+
+        for address, delta in _delegation_deltas.items():
+            if delta > 0:
+                self._addDelegation(address, delta)
+            elif delta < 0:
+                self._subtractDelegation(address, -delta)
+
+    def _addDelegation(self, _prep_address: Address, _value: int):
+        """
+        Add an amount to the SCORE's delegation of a P-Rep.
+        A P-Rep, which is not part of the SCORE's delegations, starts at the amount. Callers adding a new P-Rep
+        on behalf of a user have to make sure it is a P-Rep.
+        """
 
-        self._new_unlocked_total.set(self._new_unlocked_total.get() + wallet_unlocked_licx)
-        self._total_unstake_in_term.set(self._total_unstake_in_term.get() + wallet_leave_licx)
+        if not _value:
+            return
+        if _prep_address in self._delegation_keys:
+            self._delegation[_prep_address] += _value
+        else:
+            self._delegation[_prep_address] = _value
+            self._delegation_keys.add(_prep_address)
+            # the template does not know the new P-Rep, it is rebuilt by the next _delegate
+            self._delegation_template.remove()
 
-    def _getNextLinkedListId(self, _linked_list_id: int) -> int:
+    def _subtractDelegation(self, _prep_address: Address, _value: int):
         """
-        Return the next ID of the wallet linked list, or return -1 if there's no following element.
+        Subtract an amount from the SCORE's delegation of a P-Rep. The P-Rep is removed, once nothing is left.
         """
 
-        address = Address.from_string(self._wallets.node_value(_linked_list_id))
-        wallet = Wallet(self.db, address)
+        if not _value or _prep_address not in self._delegation_keys:
+            return
+        value = self._delegation[_prep_address] - _value
+        if value > 0:
+            self._delegation[_prep_address] = value
+        else:
+            self._delegation_keys.remove(_prep_address)
+            del self._delegation[_prep_address]
+            # the template must not scale new delegations to the removed P-Rep
+            self._delegation_template.remove()
+
+    def _getNextLinkedListId(self, _pending_wallets: LinkedListDB, _linked_list_id: int, _wallet: Wallet) -> int:
+        """
+        Return the next ID of the pending wallets linked list, or return -1 if there's no following element.
+        The wallet of _linked_list_id is removed from the pending wallets, if it has no pending requests anymore,
+        and from the wallets as well, if its balance is below self._min_value_to_get_rewards.
+        """
 
         try:
-            # delete from wallets linked list
-            if not len(wallet.join_values) \
-                    and self._balances[address] < self._min_value_to_get_rewards.get():
-                next_id = self._wallets.next(_linked_list_id)
-                self._wallets.remove(wallet.node_id)
-            else:
-                next_id = self._wallets.next(_linked_list_id)
+            next_id = _pending_wallets.next(_linked_list_id)
         except StopIteration:
-            return -1
+            next_id = -1
+
+        if not _wallet.hasPendingRequests():
+            _pending_wallets.remove(_linked_list_id)
+            _wallet.pending_id = 0
+
+            # delete from wallets linked list
+            if _wallet.exists() and self._balances[_wallet.address] < self._min_value_to_get_rewards.get():
+                self._wallets.remove(_wallet.node_id)
+                _wallet.node_id = 0
+
         return next_id
 
     def _removeDelegations(self, _wallet: Wallet) -> int:
@@ -590,13 +1473,9 @@ class LiquidICX(IconScoreBase, IRC2TokenStandard):
         """
 
         sum_undelegated = 0
-        while len(_wallet.delegation_address) != 0:
-            prep_address = _wallet.delegation_address.pop()
-            deleg = _wallet.delegation_value.pop()
-            self._delegation[prep_address] -= deleg
+        for prep_address, deleg in _wallet.removeDelegations():
+            self._subtractDelegation(prep_address, deleg)
             sum_undelegated += deleg
-            if self._delegation[prep_address] <= 0:
-                Utils.remove_from_array(self._delegation_keys, prep_address)
 
         return sum_undelegated
 
@@ -610,51 +1489,66 @@ class LiquidICX(IconScoreBase, IRC2TokenStandard):
         for address, value in _delegations.items():
             prep_address: Address = Address.from_string(address)
 
-            if prep_address in self._delegation:
-                self._delegation[prep_address] += value
-            elif not Utils.isPrep(self.db, prep_address):
+            if prep_address not in self._delegation_keys and not self._isPrep(prep_address):
                 revert("LiquidICX: Given address is not a P-Rep.")
-            else:
-                self._delegation[prep_address] = value
-                self._delegation_keys.put(prep_address)
+            self._addDelegation(prep_address, value)
 
-            _wallet.delegation_value.put(value)
-            _wallet.delegation_address.put(prep_address)
+            _wallet.addDelegationValue(prep_address, value)
             sum_delegated += value
 
         return sum_delegated
 
     def _addDelegationsProportionallyToWallet(self, _wallet: Wallet, _value: int):
-        for i in range(len(_wallet.delegation_value)):
-            basis_point = Utils.calcBPS(_wallet.delegation_value[i], self._balances[_wallet.address])
+        balance = self._balances[_wallet.address]
+        for prep_address, delegation_value in _wallet.delegations:
+            basis_point = Utils.calcBPS(delegation_value, balance)
             additional_delegation = int((_value * basis_point) / 10000)
 
-            _wallet.delegation_value[i] += additional_delegation
-            self._delegation[_wallet.delegation_address[i]] += additional_delegation
+            _wallet.addDelegationValue(prep_address, additional_delegation)
+            self._addDelegation(prep_address, additional_delegation)
 
     def _addDelegationsProportionallyToSCORE(self, _wallet: Wallet, _value: int):
         delegations = self._getDelegationDictProportionalToSCORE(_value)
 
         for address, value in delegations.items():
             prep_address: Address = Address.from_string(address)
-            _wallet.delegation_value.put(value)
-            _wallet.delegation_address.put(prep_address)
-            self._delegation[prep_address] += value
+            # the default P-Rep is used, if the SCORE does not delegate yet
+            if prep_address not in self._delegation_keys and not self._isPrep(prep_address):
+                revert("LiquidICX: Given address is not a P-Rep.")
+            _wallet.addDelegationValue(prep_address, value)
+            self._addDelegation(prep_address, value)
 
     def _getDelegationDictProportionalToSCORE(self, _total_voting_amount: int) -> dict:
         """
-        Return a dict that has the SCORE delegations scaled to an amount
+        Return a dict that has the SCORE delegations scaled to an amount.
+        The SCORE delegations are the ones sent to the System SCORE the last time, so no call to it is needed.
         :param _total_voting_amount: amount that should get scaled to the SCORE delegations
         """
 
         proportional_delegations = {}
         if len(self._delegation_keys) != 0:
-            score_delegations = self.getDelegation()
-            for it in score_delegations["delegations"]:
-                basis_point = Utils.calcBPS(it["value"], score_delegations["totalDelegated"])
+            template = self._delegation_template.get()
+            if template is None:
+                # SCORE delegated before the template was stored, use its current delegations instead
+                delegations = [{"address": address, "value": self._delegation[address]}
+                               for address in self._delegation_keys]
+                template = self._buildDelegationTemplate(delegations, sum(it["value"] for it in delegations))
+
+            reader = PackReader(template)
+            remainder = _total_voting_amount
+            while not reader.at_end():
+                address = reader.read_address()
+                basis_point = reader.read_int()
                 delegation_value = Utils.calcValueProportionalToBasisPoint(_total_voting_amount, basis_point)
-                proportional_delegations[str(it["address"])] = delegation_value
-        else:
+                proportional_delegations[str(address)] = delegation_value
+                remainder -= delegation_value
+
+            # the rounding remainder goes to the first P-Rep, so the delegations add up to the amount
+            if proportional_delegations:
+                first_address = next(iter(proportional_delegations))
+                proportional_delegations[first_address] += remainder
+
+        if not proportional_delegations:
             proportional_delegations[str(PREP_ADDRESS)] = _total_voting_amount
 
         return proportional_delegations
@@ -667,5 +1561,5 @@ class LiquidICX(IconScoreBase, IRC2TokenStandard):
 
     def _add_wallet_if_enough_funds(self, _wallet: Wallet):
         if not _wallet.exists() and self._balances[_wallet.address] >= self._min_value_to_get_rewards.get():
-            node_id = self._wallets.append(str(_wallet.address))
+            node_id = self._wallets.append(_wallet.address)
             _wallet.node_id = node_id
@@ -0,0 +1,154 @@
+from .scorelib.packing import *
+from .wallet import Wallet
+
+
+class _PackedValue:
+    """ In-memory stand-in for a VarDB of a packed wallet """
+
+    def __init__(self, value: int = 0):
+        self._value = value
+
+    def get(self) -> int:
+        return self._value
+
+    def set(self, value: int) -> None:
+        self._value = value
+
+    def remove(self) -> None:
+        self._value = 0
+
+
+class _PackedArray(list):
+    """ In-memory stand-in for an ArrayDB or a QueueDB of a packed wallet """
+
+    def put(self, value) -> None:
+        self.append(value)
+
+    def get(self, index: int = 0):
+        return self[index]
+
+    def peek(self):
+        return self[0]
+
+    def pop_front(self):
+        return self.pop(0)
+
+
+class _PackedDict(dict):
+    """ In-memory stand-in for an IterableDictDB of a packed wallet """
+
+    def keys(self) -> list:
+        return list(super().keys())
+
+    def items(self) -> list:
+        return list(super().items())
+
+    def reindex(self) -> None:
+        pass
+
+
+class PackedWallet(Wallet):
+    """
+    Wallet, which is stored as one bytes record instead of a storage entry per value and queue element.
+    The record is read once when the wallet is created and written once with save().
+
+    A wallet without a record is loaded from the storage layout of Wallet.
+    The first save() writes its record and removes the old entries.
+    """
+
+    __slots__ = ('_records', '_record', '_legacy')
+
+    _RECORD_VERSION = 1
+
+    def __init__(self, db: IconScoreDatabase, _address: Address):
+        self._address = _address
+        self._records = DictDB("packed_wallets", db, value_type=bytes)
+        self._legacy = None
+
+        self._record = self._records[_address]
+        if self._record:
+            self._unpack(self._record)
+        else:
+            legacy = Wallet(db, _address)
+            self._load(legacy)
+            if not legacy.isEmpty():
+                self._legacy = legacy
+
+    def _load(self, _wallet: Wallet):
+        self._locked = _PackedValue(_wallet.locked)
+        self._unstaking = _PackedValue(_wallet.unstaking)
+        self._node_id = _PackedValue(_wallet.node_id)
+        self._pending_id = _PackedValue(_wallet.pending_id)
+        self._reward_index = _PackedValue(_wallet.reward_index)
+
+        self._join_values = _PackedArray(_wallet.join_values)
+        self._unlock_heights = _PackedArray(_wallet.unlock_heights)
+        self._leave_values = _PackedArray(_wallet.leave_values)
+        self._unstake_heights = _PackedArray(_wallet.unstake_heights)
+
+        self._delegations = _PackedDict(_wallet.delegations)
+        self._legacy_delegation_value = ()
+
+    def _unpack(self, _record: bytes):
+        reader = PackReader(_record)
+        if reader.read_int() != self._RECORD_VERSION:
+            raise PackError("unknown wallet record version")
+
+        self._locked = _PackedValue(reader.read_int())
+        self._unstaking = _PackedValue(reader.read_int())
+        self._node_id = _PackedValue(reader.read_int())
+        self._pending_id = _PackedValue(reader.read_int())
+        self._reward_index = _PackedValue(reader.read_int())
+
+        self._join_values = _PackedArray(reader.read_ints())
+        self._unlock_heights = _PackedArray(reader.read_ints())
+        self._leave_values = _PackedArray(reader.read_ints())
+        self._unstake_heights = _PackedArray(reader.read_ints())
+
+        self._delegations = _PackedDict()
+        for _ in range(reader.read_int()):
+            prep_address = reader.read_address()
+            self._delegations[prep_address] = reader.read_int()
+        self._legacy_delegation_value = ()
+
+    def pack(self) -> bytes:
+        writer = PackWriter()
+        writer.write_int(self._RECORD_VERSION)
+
+        writer.write_int(self.locked)
+        writer.write_int(self.unstaking)
+        writer.write_int(self.node_id)
+        writer.write_int(self.pending_id)
+        writer.write_int(self.reward_index)
+
+        writer.write_ints(self._join_values)
+        writer.write_ints(self._unlock_heights)
+        writer.write_ints(self._leave_values)
+        writer.write_ints(self._unstake_heights)
+
+        writer.write_int(len(self._delegations))
+        for address, value in self._delegations.items():
+            writer.write_address(address)
+            writer.write_int(value)
+
+        return writer.to_bytes()
+
+    def save(self):
+        """
+        Writes the record of the wallet, if it changed. The record of an empty wallet is removed.
+        """
+
+        if self._legacy is not None:
+            self._legacy.delete()
+            self._legacy = None
+
+        if self.isEmpty():
+            if self._record:
+                del self._records[self._address]
+            self._record = None
+            return
+
+        record = self.pack()
+        if record != self._record:
+            self._records[self._address] = record
+            self._record = record
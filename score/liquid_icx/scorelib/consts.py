@@ -29,6 +29,51 @@ ZERO_WALLET_ADDRESS = Address.from_string('hx00000000000000000000000000000000000
 TERM_LENGTH = 43120
 UNSTAKING_MARGIN = 300
 
+# Fixed-point precision of the cumulative reward index
+REWARD_INDEX_PRECISION = 10 ** 18
+
+# Step costs used to estimate the steps of a distribute call
+STEP_COST_DB_READ = 3000
+STEP_COST_DB_READ_PER_BYTE = 25
+STEP_COST_DB_WRITE = 10000
+STEP_COST_DB_WRITE_PER_BYTE = 320
+STEP_COST_DB_DELETE = 200
+STEP_COST_CONTRACT_CALL = 25000
+
+# Steps kept aside for re-staking, re-delegating and closing a distribute cycle
+STEP_RESERVE_END_DISTRIBUTION = 1000000
+
+# Max number of main and sub P-Reps, which users can delegate to
+MAX_PREP_COUNT = 100
+
+# Max number of pending wallet shards, which can be distributed independently
+MAX_DISTRIBUTE_SHARDS = 16
+
+# Readonly methods, which can be called through multicall, and the types of their parameters
+MULTICALL_METHODS = {
+    "name": {},
+    "symbol": {},
+    "decimals": {},
+    "totalSupply": {},
+    "balanceOf": {"_owner": Address},
+    "lockedOf": {"_owner": Address},
+    "getWallet": {"_address": Address},
+    "getWalletByNodeID": {"_node_id": int},
+    "isPackedWallets": {},
+    "getStaked": {},
+    "rewards": {},
+    "getRewardIndex": {},
+    "getDelegation": {},
+    "getDelegationCallStats": {},
+    "getIterationLimit": {},
+    "getStepBudget": {},
+    "getMinValueToGetRewards": {},
+    "getTotalUnstakeInTerm": {},
+    "getDistributionState": {},
+    "getCap": {},
+    "newUnlockedTotal": {}
+}
+
 # Temporary System Contract for easier developing
 FAKE_SYSTEM_CONTRACT_LOCAL = Address.from_string('cx7c0f2d7d4253a230177bf95b897e0321ac5e43d1')
 FAKE_SYSTEM_CONTRACT_YEOUIDO = Address.from_string('cx2b01010a92bf78ee464be0b5eff94676e95cd757')
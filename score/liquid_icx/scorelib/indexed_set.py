@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 ICONation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from iconservice import *
+
+
+class IndexedSetDB:
+    """ IndexedSetDB is an iterable collection of unique items.
+        The items are stored in an ArrayDB with the same key, so an existing ArrayDB can be turned into
+        an IndexedSetDB by calling reindex() once.
+        The position of each item is stored in a DictDB, which makes contains, add and remove O(1).
+        Removing an item moves the last item to its position.
+    """
+
+    _NAME = '_INDEXED_SETDB'
+
+    def __init__(self, var_key: str, db: IconScoreDatabase, value_type: type):
+        self._name = var_key + IndexedSetDB._NAME
+        self._items = ArrayDB(var_key, db, value_type)
+        # position + 1 of each item, 0 if the item is not part of the set
+        self._positions = DictDB(f'{self._name}_positions', db, int)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __getitem__(self, index: int):
+        return self._items[index]
+
+    def __contains__(self, item) -> bool:
+        return self._positions[item] > 0
+
+    def add(self, item) -> bool:
+        """ Adds an item to the set. Returns False if it was already part of it """
+        if item in self:
+            return False
+        self._items.put(item)
+        self._positions[item] = len(self._items)
+        return True
+
+    def remove(self, item) -> bool:
+        """ Removes an item from the set. Returns False if it was not part of it """
+        position = self._positions[item]
+        if not position:
+            return False
+
+        last = self._items.pop()
+        if last != item:
+            self._items[position - 1] = last
+            self._positions[last] = position
+        del self._positions[item]
+        return True
+
+    def reindex(self) -> None:
+        """ Rebuilds the positions of all items, e.g. after the set was written as a plain ArrayDB """
+        for position, item in enumerate(self._items, 1):
+            self._positions[item] = position
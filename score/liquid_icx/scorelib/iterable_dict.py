@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 ICONation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from iconservice import *
+from .indexed_set import *
+
+
+class IterableDictDB:
+    """ IterableDictDB is a DictDB, which knows its keys.
+        The keys are kept in an IndexedSetDB with the same key, so reading, writing and deleting
+        a single entry is O(1) and the entries can be iterated in the order of the keys.
+    """
+
+    _NAME = '_ITERABLE_DICTDB'
+
+    def __init__(self, var_key: str, db: IconScoreDatabase, key_type: type, value_type: type):
+        self._name = var_key + IterableDictDB._NAME
+        self._keys = IndexedSetDB(var_key, db, key_type)
+        self._values = DictDB(f'{self._name}_values', db, value_type)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __contains__(self, key) -> bool:
+        return key in self._keys
+
+    def __getitem__(self, key):
+        return self._values[key]
+
+    def __setitem__(self, key, value) -> None:
+        self._keys.add(key)
+        self._values[key] = value
+
+    def __delitem__(self, key) -> None:
+        if self._keys.remove(key):
+            del self._values[key]
+
+    def get(self, key, default=None):
+        if key in self._keys:
+            return self._values[key]
+        return default
+
+    def keys(self) -> list:
+        return list(self._keys)
+
+    def items(self) -> list:
+        return [(key, self._values[key]) for key in self._keys]
+
+    def clear(self) -> None:
+        for key in self.keys():
+            del self[key]
+
+    def reindex(self) -> None:
+        """ Rebuilds the index of the keys, e.g. after they were written as a plain ArrayDB """
+        self._keys.reindex()
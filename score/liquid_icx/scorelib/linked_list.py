@@ -17,6 +17,7 @@
 from iconservice import *
 from .id_factory import *
 from .consts import *
+from .packing import *
 
 
 class EmptyLinkedListException(Exception):
@@ -41,8 +42,9 @@ class _NodeDB:
     """
     _NAME = '_NODEDB'
 
-    def __init__(self, var_key: str, db: IconScoreDatabase, value_type: type):
+    def __init__(self, var_key: str, db: IconScoreDatabase, value_type: type, node_id: int):
         self._name = var_key + _NodeDB._NAME
+        self._id = node_id
         self._init = VarDB(f'{self._name}_init', db, int)
         self._value = VarDB(f'{self._name}_value', db, value_type)
         self._next = VarDB(f'{self._name}_next', db, int)
@@ -57,8 +59,7 @@ class _NodeDB:
 
     @property
     def id(self) -> int:
-        # hardcoded string, will work only for LICX
-        return int(self._name.replace("wallets_LINKED_LISTDB_NODEDB", ""))
+        return self._id
 
     def exists(self) -> bool:
         return self._init.get() == 1
@@ -70,6 +71,13 @@ class _NodeDB:
         self._init.set(1)
         self._value.set(value)
 
+    def create(self, value, prev_id: int = 0, next_id: int = 0) -> None:
+        self.set_value(value)
+        if prev_id:
+            self.set_prev(prev_id)
+        if next_id:
+            self.set_next(next_id)
+
     def get_next(self) -> int:
         return self._next.get()
 
@@ -83,22 +91,145 @@ class _NodeDB:
         self._prev.set(prev_id)
 
 
+class _PackedNodeDB:
+    """ PackedNodeDB is an item of a packed LinkedListDB
+        The value and the links of the node are stored in one record, which is read once
+        Nodes stored by _NodeDB are still readable and get packed when they are written,
+        their values are read as legacy_value_type and converted to value_type
+    """
+
+    def __init__(self,
+                 var_key: str,
+                 db: IconScoreDatabase,
+                 value_type: type,
+                 node_id: int,
+                 records: DictDB,
+                 legacy_value_type: type = None):
+        self._name = var_key
+        self._db = db
+        self._id = node_id
+        self._records = records
+        self._value_type = value_type
+        self._legacy_value_type = legacy_value_type or value_type
+        self._load()
+
+    def _load(self) -> None:
+        self._legacy = None
+        self._exists = False
+        self._value = None
+        self._prev = 0
+        self._next = 0
+
+        record = self._records[self._id]
+        if record:
+            reader = PackReader(record)
+            self._prev = reader.read_int()
+            self._next = reader.read_int()
+            self._value = reader.read_value(self._value_type)
+            self._exists = True
+        else:
+            legacy = _NodeDB(self._name, self._db, self._legacy_value_type, self._id)
+            if legacy.exists():
+                self._legacy = legacy
+                self._value = _convert_value(legacy.get_value(), self._value_type)
+                self._prev = legacy.get_prev()
+                self._next = legacy.get_next()
+                self._exists = True
+
+    def _save(self) -> None:
+        if self._legacy is not None:
+            self._legacy.delete()
+            self._legacy = None
+
+        writer = PackWriter()
+        writer.write_int(self._prev)
+        writer.write_int(self._next)
+        writer.write_value(self._value, self._value_type)
+        self._records[self._id] = writer.to_bytes()
+
+    def pack(self) -> None:
+        """ Stores a node written by _NodeDB in one record """
+        if self._legacy is not None:
+            self._save()
+
+    def delete(self) -> None:
+        if self._legacy is not None:
+            self._legacy.delete()
+            self._legacy = None
+        del self._records[self._id]
+        self._exists = False
+        self._value = None
+        self._prev = 0
+        self._next = 0
+
+    @property
+    def id(self) -> int:
+        return self._id
+
+    def exists(self) -> bool:
+        return self._exists
+
+    def get_value(self):
+        return self._value
+
+    def set_value(self, value) -> None:
+        self._value = value
+        self._exists = True
+        self._save()
+
+    def create(self, value, prev_id: int = 0, next_id: int = 0) -> None:
+        self._value = value
+        self._prev = prev_id
+        self._next = next_id
+        self._exists = True
+        self._save()
+
+    def get_next(self) -> int:
+        return self._next
+
+    def set_next(self, next_id: int) -> None:
+        self._next = next_id
+        self._save()
+
+    def get_prev(self) -> int:
+        return self._prev
+
+    def set_prev(self, prev_id: int) -> None:
+        self._prev = prev_id
+        self._save()
+
+
+def _convert_value(value, value_type: type):
+    if isinstance(value, str) and value_type == Address:
+        return Address.from_string(value)
+    return value
+
+
 class LinkedListDB:
     """ LinkedListDB is an iterable collection of items double linked by unique IDs.
         Order of retrieval is preserved.
         Circular linked listing or duplicates nodes in the same linkedlist is *not allowed*
         in order to prevent infinite loops.
+        A packed LinkedListDB stores each node in one record instead of four entries.
+        Its nodes stored in four entries are read with legacy_value_type, which may be str for an Address list.
     """
 
     _NAME = '_LINKED_LISTDB'
 
-    def __init__(self, var_key: str, db: IconScoreDatabase, value_type: type):
+    def __init__(self,
+                 var_key: str,
+                 db: IconScoreDatabase,
+                 value_type: type,
+                 packed: bool = False,
+                 legacy_value_type: type = None):
         self._name = var_key + LinkedListDB._NAME
         self._head_id = VarDB(f'{self._name}_head_id', db, int)
         self._tail_id = VarDB(f'{self._name}_tail_id', db, int)
         self._length = VarDB(f'{self._name}_length', db, int)
         self._value_type = value_type
         self._db = db
+        self._packed_nodes = DictDB(f'{self._name}_packed_nodes', db, bytes) if packed else None
+        self._legacy_value_type = legacy_value_type
 
     def delete(self) -> None:
         self.clear()
@@ -118,19 +249,22 @@ class LinkedListDB:
 
         node = self._get_node(cur_id)
         yield (cur_id, node.get_value())
-        tail_id = self._tail_id.get()
 
-        # Iterate until tail
-        while cur_id != tail_id:
-            cur_id = node.get_next()
+        # Iterate until tail, which has no next node
+        cur_id = node.get_next()
+        while cur_id:
             node = self._get_node(cur_id)
             yield (cur_id, node.get_value())
-            tail_id = self._tail_id.get()
+            cur_id = node.get_next()
 
-    def _node(self, node_id) -> _NodeDB:
-        return _NodeDB(str(node_id) + self._name, self._db, self._value_type)
+    def _node(self, node_id):
+        name = str(node_id) + self._name
+        if self._packed_nodes is not None:
+            return _PackedNodeDB(name, self._db, self._value_type, node_id, self._packed_nodes,
+                                 self._legacy_value_type)
+        return _NodeDB(name, self._db, self._value_type, node_id)
 
-    def _create_node(self, value, node_id: int = None) -> tuple:
+    def _create_node(self, value, node_id: int = None, prev_id: int = 0, next_id: int = 0) -> tuple:
         if node_id is None:
             node_id = IdFactory(self._name + '_nodedb', self._db).get_uid()
 
@@ -140,13 +274,20 @@ class LinkedListDB:
         if node.exists():
             raise LinkedNodeAlreadyExists(self._name, node_id)
 
-        node.set_value(value)
+        node.create(value, prev_id, next_id)
         return node_id, node
 
-    def _get_node(self, node_id: int) -> _NodeDB:
+    def _get_node(self, node_id: int, nodes: dict = None) -> _NodeDB:
+        """ Returns an existing node. An operation, which may get the same node twice, passes a dict of the nodes
+            it got already, so a packed node is changed through one instance """
+        if nodes is not None and node_id in nodes:
+            return nodes[node_id]
+
         node = self._node(node_id)
         if not node.exists():
             raise LinkedNodeNotFound(self._name, node_id)
+        if nodes is not None:
+            nodes[node_id] = node
         return node
 
     def get_tail_node(self) -> _NodeDB:
@@ -173,6 +314,11 @@ class LinkedListDB:
         """ Returns the value of the tail of the linkedlist """
         return self.node_value(self._tail_id.get())
 
+    def pack_node(self, cur_id: int) -> None:
+        """ Stores a node of a packed linkedlist in one record, if it is still stored in four entries """
+        if self._packed_nodes is not None:
+            self._get_node(cur_id).pack()
+
     def next(self, cur_id: int) -> int:
         """ Get the next node id from a given node
             Raises StopIteration if it doesn't exist """
@@ -218,17 +364,16 @@ class LinkedListDB:
 
     def append(self, value, node_id: int = None) -> int:
         """ Append an element at the end of the linkedlist """
-        cur_id, cur = self._create_node(value, node_id)
-
         if self._length.get() == 0:
             # Empty LinkedList
+            cur_id, cur = self._create_node(value, node_id)
             self._head_id.set(cur_id)
             self._tail_id.set(cur_id)
         else:
             # Append to tail
             tail = self.get_tail_node()
+            cur_id, cur = self._create_node(value, node_id, prev_id=tail.id)
             tail.set_next(cur_id)
-            cur.set_prev(self._tail_id.get())
             # Update tail to cur node
             self._tail_id.set(cur_id)
 
@@ -238,17 +383,16 @@ class LinkedListDB:
 
     def prepend(self, value, node_id: int = None) -> int:
         """ Prepend an element at the beginning of the linkedlist """
-        cur_id, cur = self._create_node(value, node_id)
-
         if self._length.get() == 0:
             # Empty LinkedList
+            cur_id, cur = self._create_node(value, node_id)
             self._head_id.set(cur_id)
             self._tail_id.set(cur_id)
         else:
             # Prepend to head
-            head = self._get_head_node()
+            head = self.get_head_node()
+            cur_id, cur = self._create_node(value, node_id, next_id=head.id)
             head.set_prev(cur_id)
-            cur.set_next(self._head_id.get())
             # Update head to cur node
             self._head_id.set(cur_id)
 
@@ -262,19 +406,15 @@ class LinkedListDB:
             return self.append(value, node_id)
 
         after = self._get_node(after_id)
-        cur_id, cur = self._create_node(value, node_id)
-
         afternext_id = after.get_next()
         afternext = self._get_node(afternext_id)
 
+        # cur>pid, cur>nid
+        cur_id, cur = self._create_node(value, node_id, prev_id=after_id, next_id=afternext_id)
         # after>nid
         after.set_next(cur_id)
         # after>next>pid
         afternext.set_prev(cur_id)
-        # cur>nid
-        cur.set_next(afternext_id)
-        # cur>pid
-        cur.set_prev(after_id)
 
         self._length.set(self._length.get() + 1)
         return cur_id
@@ -285,19 +425,15 @@ class LinkedListDB:
             return self.prepend(value, node_id)
 
         before = self._get_node(before_id)
-        cur_id, cur = self._create_node(value, node_id)
-
         beforeprev_id = before.get_prev()
         beforeprev = self._get_node(beforeprev_id)
 
+        # cur>pid, cur>nid
+        cur_id, cur = self._create_node(value, node_id, prev_id=beforeprev_id, next_id=before_id)
         # before>pid
         before.set_prev(cur_id)
         # before>prev>nid
         beforeprev.set_next(cur_id)
-        # cur>nid
-        cur.set_next(before_id)
-        # cur>pid
-        cur.set_prev(beforeprev_id)
 
         self._length.set(self._length.get() + 1)
         return cur_id
@@ -310,21 +446,22 @@ class LinkedListDB:
         if after_id == self._tail_id.get():
             return self.move_node_tail(cur_id)
 
-        cur = self._get_node(cur_id)
+        nodes = {}
+        cur = self._get_node(cur_id, nodes)
 
         if after_id == cur.get_prev():
             # noop
             return
 
-        after = self._get_node(after_id)
+        after = self._get_node(after_id, nodes)
         afternext_id = after.get_next()
-        afternext = self._get_node(afternext_id)
+        afternext = self._get_node(afternext_id, nodes)
         curprev_id = cur.get_prev()
         if curprev_id:  # cur may be the head
-            curprev = self._get_node(curprev_id)
+            curprev = self._get_node(curprev_id, nodes)
         curnext_id = cur.get_next()
         if curnext_id:  # cur may be the tail
-            curnext = self._get_node(curnext_id)
+            curnext = self._get_node(curnext_id, nodes)
 
         # after>nid
         after.set_next(cur_id)
@@ -355,21 +492,22 @@ class LinkedListDB:
         if before_id == self._head_id.get():
             return self.move_node_head(cur_id)
 
-        cur = self._get_node(cur_id)
+        nodes = {}
+        cur = self._get_node(cur_id, nodes)
 
         if before_id == cur.get_next():
             # noop
             return
 
-        before = self._get_node(before_id)
+        before = self._get_node(before_id, nodes)
         beforeprev_id = before.get_prev()
-        beforeprev = self._get_node(beforeprev_id)
+        beforeprev = self._get_node(beforeprev_id, nodes)
         curprev_id = cur.get_prev()
         if curprev_id:  # cur may be the head
-            curprev = self._get_node(curprev_id)
+            curprev = self._get_node(curprev_id, nodes)
         curnext_id = cur.get_next()
         if curnext_id:  # cur may be the tail
-            curnext = self._get_node(curnext_id)
+            curnext = self._get_node(curnext_id, nodes)
 
         # before>pid
         before.set_prev(cur_id)
@@ -397,22 +535,28 @@ class LinkedListDB:
         if cur_id == self._tail_id.get():
             raise LinkedNodeCannotMoveItself(self._name, cur_id)
 
-        cur = self._get_node(cur_id)
+        nodes = {}
+        cur = self._get_node(cur_id, nodes)
         tail_id = self._tail_id.get()
-        tail = self._get_node(tail_id)
+        tail = self._get_node(tail_id, nodes)
         curprev_id = cur.get_prev()
-        curprev = self._get_node(curprev_id)
         curnext_id = cur.get_next()
-        curnext = self._get_node(curnext_id)
+        curnext = self._get_node(curnext_id, nodes)
 
         # curprev>nid
-        curprev.set_next(curnext_id)
+        if curprev_id:  # cur may be the head
+            self._get_node(curprev_id, nodes).set_next(curnext_id)
+        else:
+            # cur was head, set new head
+            self._head_id.set(curnext_id)
         # curnext>pid
         curnext.set_prev(curprev_id)
         # tail>nid
         tail.set_next(cur_id)
         # cur>pid
         cur.set_prev(tail_id)
+        # cur>nid
+        cur.set_next(0)
         # update tail
         self._tail_id.set(cur_id)
 
@@ -421,20 +565,26 @@ class LinkedListDB:
         if cur_id == self._head_id.get():
             raise LinkedNodeCannotMoveItself(self._name, cur_id)
 
-        cur = self._get_node(cur_id)
+        nodes = {}
+        cur = self._get_node(cur_id, nodes)
         head_id = self._head_id.get()
-        head = self._get_node(head_id)
+        head = self._get_node(head_id, nodes)
         curprev_id = cur.get_prev()
-        curprev = self._get_node(curprev_id)
+        curprev = self._get_node(curprev_id, nodes)
         curnext_id = cur.get_next()
-        curnext = self._get_node(curnext_id)
 
         # curprev>nid
         curprev.set_next(curnext_id)
         # curnext>pid
-        curnext.set_prev(curprev_id)
+        if curnext_id:  # cur may be the tail
+            self._get_node(curnext_id, nodes).set_prev(curprev_id)
+        else:
+            # cur was tail, set new tail
+            self._tail_id.set(curprev_id)
         # head>pid
         head.set_prev(cur_id)
+        # cur>pid
+        cur.set_prev(0)
         # cur>nid
         cur.set_next(head_id)
         # update head
@@ -483,6 +633,21 @@ class LinkedListDB:
             cur.delete()
             self._length.set(self._length.get() - 1)
 
+    def page(self, cur_id: int, limit: int) -> tuple:
+        """ Returns up to limit items starting at a given node id, or at the head if the id is 0,
+            and the id of the node following them, which is 0 at the end of the linkedlist.
+            Unlike select, the items before the page are not visited """
+        if not cur_id:
+            cur_id = self._head_id.get()
+
+        result = []
+        while cur_id and len(result) < limit:
+            node = self._get_node(cur_id)
+            result.append((cur_id, node.get_value()))
+            cur_id = node.get_next()
+
+        return result, cur_id
+
     def select(self, offset: int, cond=None, **kwargs) -> list:
         """ Returns a limited amount of items in the LinkedListDB that optionally fulfills a condition """
         items = iter(self)
@@ -510,4 +675,3 @@ class LinkedListDB:
                 break
 
         return result
-
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 ICONation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from iconservice import *
+
+ADDRESS_BYTE_SIZE = 21
+
+
+class PackError(Exception):
+    pass
+
+
+class PackWriter:
+    """ PackWriter serializes values into one bytes record.
+        Integers are stored as a one byte length followed by their signed big endian bytes,
+        addresses as their 21 bytes including the prefix.
+    """
+
+    def __init__(self):
+        self._data = bytearray()
+
+    def write_int(self, value: int) -> 'PackWriter':
+        encoded = value.to_bytes(value.bit_length() // 8 + 1, 'big', signed=True)
+        if len(encoded) > 0xff:
+            raise PackError("integer too large")
+        self._data.append(len(encoded))
+        self._data += encoded
+        return self
+
+    def write_address(self, value: Address) -> 'PackWriter':
+        self._data += value.to_bytes_including_prefix()
+        return self
+
+    def write_bytes(self, value: bytes) -> 'PackWriter':
+        """ Writes the length of the value followed by the value """
+        self.write_int(len(value))
+        self._data += value
+        return self
+
+    def write_value(self, value, value_type: type) -> 'PackWriter':
+        """ Writes a value of one of the types int, str, bytes or Address """
+        if value_type == int:
+            return self.write_int(value)
+        if value_type == str:
+            return self.write_bytes(value.encode('utf-8'))
+        if value_type == bytes:
+            return self.write_bytes(value)
+        if value_type == Address:
+            return self.write_address(value)
+        raise PackError(f"unsupported value type {value_type}")
+
+    def write_ints(self, values: list) -> 'PackWriter':
+        """ Writes the number of values followed by the values """
+        self.write_int(len(values))
+        for value in values:
+            self.write_int(value)
+        return self
+
+    def to_bytes(self) -> bytes:
+        return bytes(self._data)
+
+
+class PackReader:
+    """ PackReader reads the values of a record written by PackWriter in the same order """
+
+    def __init__(self, data: bytes):
+        self._data = data
+        self._offset = 0
+
+    def _take(self, size: int) -> bytes:
+        end = self._offset + size
+        if end > len(self._data):
+            raise PackError("unexpected end of record")
+        value = self._data[self._offset:end]
+        self._offset = end
+        return value
+
+    def read_int(self) -> int:
+        size = self._take(1)[0]
+        return int.from_bytes(self._take(size), 'big', signed=True)
+
+    def read_address(self) -> Address:
+        return Address.from_bytes_including_prefix(self._take(ADDRESS_BYTE_SIZE))
+
+    def read_bytes(self) -> bytes:
+        return bytes(self._take(self.read_int()))
+
+    def read_value(self, value_type: type):
+        if value_type == int:
+            return self.read_int()
+        if value_type == str:
+            return self.read_bytes().decode('utf-8')
+        if value_type == bytes:
+            return self.read_bytes()
+        if value_type == Address:
+            return self.read_address()
+        raise PackError(f"unsupported value type {value_type}")
+
+    def read_ints(self) -> list:
+        return [self.read_int() for _ in range(self.read_int())]
+
+    def at_end(self) -> bool:
+        return self._offset == len(self._data)
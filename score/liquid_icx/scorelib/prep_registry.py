@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 ICONation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from iconservice import *
+from .indexed_set import *
+
+
+class PRepRegistry:
+    """ PRepRegistry is the set of main and sub P-Reps, which delegations are validated against.
+        It is refreshed once per term by applying only the differences to the previous set
+        and is outdated after the term it was refreshed in ended.
+    """
+
+    def __init__(self, db: IconScoreDatabase):
+        self._preps = IndexedSetDB("prep_array", db, Address)
+        # stores height, last time when the preps got updated
+        self._updated_height = VarDB("preps_updated", db, int)
+        # start height of the term after the one, in which the preps got updated. They are outdated from then on
+        self._valid_until = VarDB("preps_valid_until", db, int)
+
+    def __len__(self) -> int:
+        return len(self._preps)
+
+    def __iter__(self):
+        return iter(self._preps)
+
+    def __contains__(self, address: Address) -> bool:
+        return address in self._preps
+
+    def isOutdated(self, block_height: int, term_start_height: int = 0) -> bool:
+        """ Returns True, if the term the set was refreshed in ended before the given block height
+            or if the set was not refreshed since the given term started """
+        if block_height >= self._valid_until.get():
+            return True
+        return term_start_height > 0 and self._updated_height.get() < term_start_height
+
+    def refresh(self, addresses: list, block_height: int, term_end_height: int) -> None:
+        """ Replaces the set with the given P-Rep addresses, only adding and removing the changed ones """
+        current = set(addresses)
+        for address in list(self._preps):
+            if address not in current:
+                self._preps.remove(address)
+        for address in addresses:
+            self._preps.add(address)
+
+        self._updated_height.set(block_height)
+        # an empty set is refreshed again by the next call
+        self._valid_until.set(term_end_height + 1 if addresses else 0)
+
+    def reindex(self) -> None:
+        """ Rebuilds the index of the set, which was stored as a plain ArrayDB before """
+        self._preps.reindex()
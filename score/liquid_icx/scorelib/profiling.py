@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 ICONation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from iconservice import *
+from .indexed_set import *
+from .packing import *
+from .pausable import NotAFunctionError
+from .step_meter import *
+
+PROFILE_FIELDS = ("transactions", "reads", "bytes_read", "writes", "bytes_written", "deletes", "calls", "steps")
+
+
+class Profiler:
+    """ Profiler sums up the storage operations and inter-SCORE calls counted by a StepMeter per method.
+        Nothing is written, as long as it is not enabled. """
+
+    def __init__(self, db: IconScoreDatabase):
+        self._enabled = VarDB("profiler_enabled", db, bool)
+        self._methods = IndexedSetDB("profiler_methods", db, str)
+        # method name -> counters in the order of PROFILE_FIELDS, packed into one record
+        self._counters = DictDB("profiler_counters", db, bytes)
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled.get()
+
+    @enabled.setter
+    def enabled(self, value: bool) -> None:
+        self._enabled.set(value)
+
+    def get(self, method: str) -> dict:
+        record = self._counters[method]
+        if record is None:
+            values = [0] * len(PROFILE_FIELDS)
+        else:
+            reader = PackReader(record)
+            values = [reader.read_int() for _ in PROFILE_FIELDS]
+        return dict(zip(PROFILE_FIELDS, values))
+
+    def table(self) -> dict:
+        return {method: self.get(method) for method in self._methods}
+
+    def record(self, method: str, counts: dict) -> None:
+        """ Adds the counts of one transaction to the counters of a method """
+        totals = self.get(method)
+        writer = PackWriter()
+        for field in PROFILE_FIELDS:
+            writer.write_int(totals[field] + counts.get(field, 0))
+
+        self._methods.add(method)
+        self._counters[method] = writer.to_bytes()
+
+    def clear(self) -> None:
+        for method in list(self._methods):
+            del self._counters[method]
+            self._methods.remove(method)
+
+
+def meterCounts(meter: StepMeter) -> dict:
+    """ Returns the counts of a StepMeter for one transaction """
+    return {
+        "transactions": 1,
+        "reads": meter.reads,
+        "bytes_read": meter.bytes_read,
+        "writes": meter.writes,
+        "bytes_written": meter.bytes_written,
+        "deletes": meter.deletes,
+        "calls": meter.calls,
+        "steps": meter.steps
+    }
+
+
+def profiled(func):
+    """ Counts the storage operations and inter-SCORE calls of an external method with self._step_meter.
+        If self._profiler is enabled, they are added to its counters and emitted with self.Profile.
+        Only for entry points, as the meter is reset at the start. """
+    if not isfunction(func):
+        raise NotAFunctionError
+
+    @wraps(func)
+    def __wrapper(self: object, *args, **kwargs):
+        self._step_meter.reset()
+        result = func(self, *args, **kwargs)
+
+        counts = meterCounts(self._step_meter)
+        if self._profiler.enabled:
+            self._profiler.record(func.__name__, counts)
+            self.Profile(func.__name__, counts["reads"], counts["writes"], counts["bytes_written"], counts["calls"],
+                         counts["steps"])
+
+        return result
+    return __wrapper
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 ICONation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from iconservice import *
+
+
+class EmptyQueueException(Exception):
+    pass
+
+
+class QueueDB:
+    """ QueueDB is a FIFO collection of items.
+        The items are stored in an ArrayDB with the same key, so an existing ArrayDB can be used as a QueueDB.
+        Removing the first item only moves the head index forward. The removed items are deleted,
+        once the queue is empty.
+        Indexes are relative to the head of the queue.
+    """
+
+    _NAME = '_QUEUEDB'
+
+    def __init__(self, var_key: str, db: IconScoreDatabase, value_type: type):
+        self._name = var_key + QueueDB._NAME
+        self._items = ArrayDB(var_key, db, value_type)
+        self._head = VarDB(f'{self._name}_head', db, int)
+
+    def __len__(self) -> int:
+        return len(self._items) - self._head.get()
+
+    def __iter__(self):
+        for index in range(self._head.get(), len(self._items)):
+            yield self._items[index]
+
+    def __getitem__(self, index: int):
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError(self._name, index)
+        return self._items[self._head.get() + index]
+
+    def __setitem__(self, index: int, value) -> None:
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError(self._name, index)
+        self._items[self._head.get() + index] = value
+
+    def put(self, value) -> None:
+        """ Adds an item at the end of the queue """
+        self._items.put(value)
+
+    def peek(self):
+        """ Returns the first item of the queue """
+        if not len(self):
+            raise EmptyQueueException(self._name)
+        return self._items[self._head.get()]
+
+    def pop_front(self):
+        """ Removes and returns the first item of the queue """
+        head = self._head.get()
+        if head >= len(self._items):
+            raise EmptyQueueException(self._name)
+
+        value = self._items[head]
+        if head + 1 == len(self._items):
+            self.clear()
+        else:
+            self._head.set(head + 1)
+        return value
+
+    def clear(self) -> None:
+        """ Removes all items """
+        while self._items:
+            self._items.pop()
+        self._head.remove()
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 ICONation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from iconservice import *
+from .consts import *
+
+
+class StepMeter:
+    """ StepMeter counts the storage operations and inter-SCORE calls of a transaction
+        and estimates how many steps they cost. """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.reads = 0
+        self.bytes_read = 0
+        self.writes = 0
+        self.bytes_written = 0
+        self.deletes = 0
+        self.calls = 0
+
+    def read(self, _value: bytes) -> None:
+        self.reads += 1
+        if _value:
+            self.bytes_read += len(_value)
+
+    def write(self, _value: bytes) -> None:
+        self.writes += 1
+        self.bytes_written += len(_value)
+
+    def delete(self) -> None:
+        self.deletes += 1
+
+    def call(self) -> None:
+        self.calls += 1
+
+    @property
+    def steps(self) -> int:
+        return self.reads * STEP_COST_DB_READ + self.bytes_read * STEP_COST_DB_READ_PER_BYTE + \
+            self.writes * STEP_COST_DB_WRITE + self.bytes_written * STEP_COST_DB_WRITE_PER_BYTE + \
+            self.deletes * STEP_COST_DB_DELETE + self.calls * STEP_COST_CONTRACT_CALL
+
+
+class MeteredDatabase:
+    """ MeteredDatabase wraps an IconScoreDatabase and reports every read, write and delete
+        of the containers built on top of it to a StepMeter. """
+
+    def __init__(self, db: IconScoreDatabase, meter: StepMeter):
+        self._db = db
+        self._meter = meter
+
+    def get_sub_db(self, prefix: bytes, *args, **kwargs) -> 'MeteredDatabase':
+        return MeteredDatabase(self._db.get_sub_db(prefix, *args, **kwargs), self._meter)
+
+    def get(self, key: bytes) -> bytes:
+        value = self._db.get(key)
+        self._meter.read(value)
+        return value
+
+    def put(self, key: bytes, value: bytes) -> None:
+        self._meter.write(value)
+        self._db.put(key, value)
+
+    def delete(self, key: bytes) -> None:
+        self._meter.delete()
+        self._db.delete(key)
+
+    def __getattr__(self, name: str):
+        return getattr(self._db, name)
+
+
+class MeteredScore:
+    """ MeteredScore wraps an interface SCORE and reports every call made through it to a StepMeter. """
+
+    def __init__(self, score: InterfaceScore, meter: StepMeter):
+        self._score = score
+        self._meter = meter
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._score, name)
+        if not callable(attr):
+            return attr
+
+        def __call(*args, **kwargs):
+            self._meter.call()
+            return attr(*args, **kwargs)
+        return __call
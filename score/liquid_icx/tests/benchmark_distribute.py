@@ -0,0 +1,173 @@
+"""
+Benchmark of the distribute cycle, run with the InMemoryHarness against the FakeSystemContract.
+
+For every pool size and number of P-Reps per wallet, a pool is built with joinBatch and three terms are measured:
+    join     - all wallets of the pool are pending, e.g. the first term after they joined
+    rewards  - rewards are distributed, but no wallet is pending
+    churn    - a part of the pool joins again and leaves, see --churn
+
+For each term the number of distribute calls, the wall time and the storage operations and inter-SCORE calls counted
+by the StepMeter of LiquidICX are reported, in total and for the largest distribute call.
+
+    python -m score.liquid_icx.tests.benchmark_distribute --sizes 1000 10000 --output distribute.json
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from iconservice import Address
+
+from score.fake_system_contract.fake_system_contract import FakeSystemContract
+from score.liquid_icx.liquid_icx import LiquidICX
+from score.liquid_icx.scorelib.consts import SYSTEM_SCORE, PREP_ADDRESS, MAX_ITERATION_LOOP
+from score.liquid_icx.scorelib.profiling import PROFILE_FIELDS, meterCounts
+from score.liquid_icx.tests.in_memory_harness import InMemoryHarness
+
+LICX_ADDRESS = Address.from_string("cx" + "11" * 20)
+OWNER = Address.from_string("hx" + "aa" * 20)
+ICX = 10 ** 18
+JOIN_VALUE = 20 * ICX
+REWARDS = 1000 * ICX
+
+METER_FIELDS = [field for field in PROFILE_FIELDS if field != "transactions"]
+
+
+def _wallet_address(index: int) -> Address:
+    return Address.from_string("hx" + f"{index + 1:040x}")
+
+
+def _prep_address(index: int) -> Address:
+    return PREP_ADDRESS if index == 0 else Address.from_string("hx" + f"{0xbb00 + index:040x}")
+
+
+class DistributeBenchmark:
+    """ Builds one pool in memory and measures its distribute cycles """
+
+    def __init__(self, wallet_count: int, preps_per_wallet: int, iteration_limit: int, packed: bool):
+        self.wallet_count = wallet_count
+        self.preps_per_wallet = preps_per_wallet
+
+        self._harness = InMemoryHarness()
+        self._harness.balances[OWNER] = 10 ** 40
+        self._harness.deploy(FakeSystemContract, SYSTEM_SCORE, OWNER)
+        self._licx = self._harness.deploy(LiquidICX, LICX_ADDRESS, OWNER)
+        self._transact("setCap", _value=10 ** 12)
+        self._transact("setIterationLimit", _iteration_limit=iteration_limit)
+        if packed:
+            self._transact("enablePackedWallets")
+
+        self._preps = [_prep_address(i) for i in range(preps_per_wallet)]
+        for prep in self._preps[1:]:
+            self._harness.transact(OWNER, SYSTEM_SCORE, "registerPRep", _address=prep)
+
+    def close(self) -> None:
+        self._harness.close()
+
+    def _transact(self, method: str, icx_value: int = 0, sender: Address = OWNER, **params):
+        return self._harness.transact(sender, LICX_ADDRESS, method, icx_value, **params)
+
+    def _delegation(self, index: int) -> dict:
+        value = JOIN_VALUE // self.preps_per_wallet
+        delegation = {str(prep): value for prep in self._preps}
+        delegation[str(self._preps[index % self.preps_per_wallet])] += JOIN_VALUE - value * self.preps_per_wallet
+        return delegation
+
+    def join(self, start: int, count: int) -> None:
+        """ Joins the wallets start to start + count with JOIN_VALUE each, MAX_ITERATION_LOOP per transaction """
+        for offset in range(start, start + count, MAX_ITERATION_LOOP):
+            indexes = range(offset, min(offset + MAX_ITERATION_LOOP, start + count))
+            entries = [{"address": str(_wallet_address(i)), "amount": JOIN_VALUE, "delegation": self._delegation(i)}
+                       for i in indexes]
+            self._transact("joinBatch", JOIN_VALUE * len(entries), _entries=json.dumps(entries))
+
+    def leave(self, start: int, count: int) -> None:
+        for i in range(start, start + count):
+            self._transact("leave", sender=_wallet_address(i))
+
+    def next_term(self, rewards: int = 0) -> None:
+        self._harness.transact(OWNER, SYSTEM_SCORE, "incrementTerm")
+        next_term = self._harness.query(SYSTEM_SCORE, "getIISSInfo")["nextPRepTerm"]
+        self._harness.transact(OWNER, SYSTEM_SCORE, "setBlockHeight", _new_height=next_term - 1)
+        self._harness.block_height = next_term - 1
+        self._harness.transact(OWNER, SYSTEM_SCORE, "setIScore", _i_score=1000 * rewards)
+
+    def distribute(self, scenario: str) -> dict:
+        """ Calls distribute until the cycle of the current term is finished and returns the measurements """
+        queue_depth = self._harness.query(LICX_ADDRESS, "getDistributionState")["remaining"]
+        batches = []
+        start = time.perf_counter()
+        while not batches or self._harness.query(LICX_ADDRESS, "getDistributionState")["distributing"]:
+            batch_start = time.perf_counter()
+            self._transact("distribute")
+            counts = meterCounts(self._licx._step_meter)
+            counts["wall_time"] = time.perf_counter() - batch_start
+            batches.append(counts)
+        wall_time = time.perf_counter() - start
+
+        fields = METER_FIELDS + ["wall_time"]
+        return {
+            "scenario": scenario,
+            "wallets": self.wallet_count,
+            "preps_per_wallet": self.preps_per_wallet,
+            "queue_depth": queue_depth,
+            "calls": len(batches),
+            "wall_time": wall_time,
+            "term": {field: sum(batch[field] for batch in batches) for field in fields},
+            "max_batch": {field: max(batch[field] for batch in batches) for field in fields}
+        }
+
+    def run(self, churn: float) -> list:
+        churn_count = max(int(self.wallet_count * churn), 1)
+        self.join(0, self.wallet_count)
+        self.next_term()
+        self.next_term()
+        results = [self.distribute("join")]
+
+        self.next_term(REWARDS)
+        results.append(self.distribute("rewards"))
+
+        self.join(0, churn_count)
+        self.leave(self.wallet_count - churn_count, churn_count)
+        self.next_term(REWARDS)
+        results.append(self.distribute("churn"))
+        return results
+
+
+def main(argv: list = None) -> dict:
+    parser = argparse.ArgumentParser(description="Benchmark the distribute cycle of LiquidICX in memory.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="wallets in the pool")
+    parser.add_argument("--preps", type=int, nargs="+", default=[1, 10], help="P-Reps each wallet delegates to")
+    parser.add_argument("--churn", type=float, default=0.1, help="part of the pool, which joins and leaves")
+    parser.add_argument("--iteration-limit", type=int, default=MAX_ITERATION_LOOP)
+    parser.add_argument("--packed", action="store_true", help="store the wallets packed")
+    parser.add_argument("--output", help="file to write the JSON results to, stdout if not set")
+    args = parser.parse_args(argv)
+
+    results = []
+    for size in args.sizes:
+        for preps in args.preps:
+            benchmark = DistributeBenchmark(size, preps, args.iteration_limit, args.packed)
+            try:
+                results += benchmark.run(args.churn)
+            finally:
+                benchmark.close()
+            print(f"{size} wallets, {preps} P-Reps per wallet done", file=sys.stderr)
+
+    report = {
+        "iteration_limit": args.iteration_limit,
+        "packed": args.packed,
+        "churn": args.churn,
+        "results": results
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+In-memory harness, which runs SCOREs directly in one Python process, without tbears or a local node.
+
+The storage of all SCOREs is kept in one dict, which is committed after each successful transaction and rolled back
+when a transaction reverts or after a query. Inter-SCORE calls through create_interface_score are routed to the
+deployed SCOREs, ICX transfers of SCOREs move the balances kept by the harness.
+
+    harness = InMemoryHarness()
+    harness.deploy(FakeSystemContract, SYSTEM_SCORE, owner)
+    harness.deploy(LiquidICX, LICX_ADDRESS, owner)
+    harness.transact(wallet, LICX_ADDRESS, "join", icx_value=10 * 10 ** 18)
+    harness.query(LICX_ADDRESS, "balanceOf", _owner=wallet)
+"""
+
+from contextlib import ExitStack
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from iconservice import Address, IconScoreBase, IconScoreException
+from iconservice.icon_constant import IconScoreContextType, IconScoreFuncType, Revision
+from iconservice.iconscore.icon_score_context import ContextContainer
+from iconservice.iconscore.icon_score_context_util import IconScoreContextUtil
+from iconservice.iconscore.icon_score_event_log import EventLogEmitter
+
+
+class MemoryStore:
+    """ Key value storage of all SCOREs. Writes are pending until they are committed. """
+
+    def __init__(self):
+        self.data = {}
+        self._pending = {}
+
+    def get(self, key: bytes):
+        if key in self._pending:
+            return self._pending[key]
+        return self.data.get(key)
+
+    def put(self, key: bytes, value: bytes) -> None:
+        self._pending[key] = value
+
+    def delete(self, key: bytes) -> None:
+        self._pending[key] = None
+
+    def commit(self) -> None:
+        for key, value in self._pending.items():
+            if value is None:
+                self.data.pop(key, None)
+            else:
+                self.data[key] = value
+        self._pending = {}
+
+    def rollback(self) -> None:
+        self._pending = {}
+
+
+class MemoryDatabase:
+    """ Stand-in for the IconScoreDatabase of a SCORE, which prefixes the keys of its sub databases """
+
+    def __init__(self, address: Address, store: MemoryStore, prefix: bytes = b""):
+        self.address = address
+        self._store = store
+        self._prefix = prefix
+
+    def get_sub_db(self, prefix: bytes, *args, **kwargs) -> 'MemoryDatabase':
+        return MemoryDatabase(self.address, self._store, self._prefix + prefix + b"|")
+
+    def get(self, key: bytes):
+        return self._store.get(self._prefix + key)
+
+    def put(self, key: bytes, value: bytes) -> None:
+        self._store.put(self._prefix + key, value)
+
+    def delete(self, key: bytes) -> None:
+        self._store.delete(self._prefix + key)
+
+    def set_observer(self, observer) -> None:
+        pass
+
+
+class _Icx:
+    """ Stand-in for IconScoreBase.icx """
+
+    def __init__(self, harness: 'InMemoryHarness', address: Address):
+        self._harness = harness
+        self._address = address
+
+    def transfer(self, to: Address, amount: int) -> bool:
+        self._harness.move_icx(self._address, to, amount)
+        return True
+
+    def send(self, to: Address, amount: int) -> bool:
+        return self.transfer(to, amount)
+
+    def get_balance(self, address: Address) -> int:
+        return self._harness.balances.get(address, 0)
+
+
+class _InterfaceScore:
+    """ Stand-in for an interface SCORE, which calls the deployed SCORE with the calling SCORE as sender """
+
+    def __init__(self, harness: 'InMemoryHarness', address: Address):
+        self._harness = harness
+        self._address = address
+
+    def __getattr__(self, name: str):
+        def __call(*args, **kwargs):
+            return self._harness.internal_call(self._address, name, *args, **kwargs)
+        return __call
+
+
+class InMemoryHarness:
+    """ Deploys SCORE classes into memory and executes their methods as transactions or queries """
+
+    def __init__(self):
+        self.store = MemoryStore()
+        self.scores = {}
+        self.owners = {}
+        self.balances = {}
+        self.events = []
+
+        self.context = SimpleNamespace(
+            type=IconScoreContextType.INVOKE,
+            func_type=IconScoreFuncType.WRITABLE,
+            revision=Revision.LATEST.value,
+            readonly=False,
+            msg=SimpleNamespace(sender=None, value=0),
+            tx=SimpleNamespace(origin=None, hash=b"\x00" * 32, timestamp=0, index=0, nonce=0),
+            block=SimpleNamespace(height=0, timestamp=0),
+            current_address=None,
+            step_counter=SimpleNamespace(get_step_cost=lambda *args: 0,
+                                         consume_step=lambda *args, **kwargs: None,
+                                         apply_step=lambda *args, **kwargs: None))
+
+        self._stack = ExitStack()
+        self._stack.enter_context(patch.object(IconScoreContextUtil, "get_owner",
+                                               side_effect=lambda context, address: self.owners.get(address)))
+        self._stack.enter_context(patch.object(EventLogEmitter, "emit_event_log", side_effect=self._emit))
+        self._stack.enter_context(patch.object(IconScoreBase, "icx",
+                                               new=property(lambda score: _Icx(self, score.address))))
+        self._stack.enter_context(patch.object(IconScoreBase, "create_interface_score",
+                                               new=staticmethod(lambda address, cls: _InterfaceScore(self, address))))
+        ContextContainer._push_context(self.context)
+
+    def close(self) -> None:
+        ContextContainer._pop_context()
+        self._stack.close()
+
+    @property
+    def block_height(self) -> int:
+        return self.context.block.height
+
+    @block_height.setter
+    def block_height(self, height: int) -> None:
+        self.context.block.height = height
+
+    def _emit(self, context, score_address: Address, event_signature: str, arguments: list, *args, **kwargs):
+        self.events.append((score_address, event_signature, arguments))
+
+    def events_of(self, event_signature: str) -> list:
+        """ Returns the arguments of all emitted events with the given signature, e.g. "Distribute(int)" """
+        return [arguments for _, signature, arguments in self.events if signature == event_signature]
+
+    def deploy(self, score_class: type, address: Address, owner: Address, **params) -> IconScoreBase:
+        """ Creates a SCORE at the given address and calls its on_install with params """
+        self.owners[address] = owner
+        db = MemoryDatabase(address, self.store, address.to_bytes())
+        score = self._with(owner, 0, address, lambda: score_class(db))
+        self.scores[address] = score
+        self.transact(owner, address, "on_install", **params)
+        return score
+
+    def _with(self, sender: Address, value: int, address: Address, function):
+        context = self.context
+        saved = (context.msg, context.current_address)
+        context.msg = SimpleNamespace(sender=sender, value=value)
+        context.current_address = address
+        try:
+            return function()
+        finally:
+            context.msg, context.current_address = saved
+
+    def internal_call(self, address: Address, method: str, *args, **kwargs):
+        score = self.scores[address]
+        return self._with(self.context.current_address, 0, address,
+                          lambda: getattr(score, method)(*args, **kwargs))
+
+    def move_icx(self, sender: Address, to: Address, amount: int) -> None:
+        if self.balances.get(sender, 0) < amount:
+            raise IconScoreException("Out of balance")
+        self.balances[sender] = self.balances.get(sender, 0) - amount
+        self.balances[to] = self.balances.get(to, 0) + amount
+
+    def transact(self, sender: Address, score_address: Address, method: str, icx_value: int = 0, **params):
+        """ Executes a method as transaction. All changes are discarded, if it raises """
+        score = self.scores[score_address]
+        return self._transaction(sender, score_address, icx_value, lambda: getattr(score, method)(**params))
+
+    def execute(self, score_address: Address, function):
+        """ Executes a function, which gets the SCORE passed, as transaction of its owner.
+            Used to write storage, which only a previous version of a SCORE could have written """
+        score = self.scores[score_address]
+        return self._transaction(self.owners[score_address], score_address, 0, lambda: function(score))
+
+    def _transaction(self, sender: Address, score_address: Address, icx_value: int, function):
+        balances = dict(self.balances)
+        event_count = len(self.events)
+        try:
+            if icx_value:
+                self.move_icx(sender, score_address, icx_value)
+            result = self._with(sender, icx_value, score_address, function)
+        except BaseException:
+            self.store.rollback()
+            self.balances = balances
+            del self.events[event_count:]
+            raise
+        self.store.commit()
+        return result
+
+    def query(self, score_address: Address, method: str, **params):
+        """ Executes a readonly method. Changes to the storage are discarded """
+        score = self.scores[score_address]
+        try:
+            return self._with(None, 0, score_address, lambda: getattr(score, method)(**params))
+        finally:
+            self.store.rollback()
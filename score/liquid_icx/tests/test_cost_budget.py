@@ -0,0 +1,194 @@
+"""
+Cost budget of the external methods of LiquidICX, run with the InMemoryHarness.
+
+Each entry of the table is a method called by a wallet of a certain shape, e.g. "transfer/many_preps". Its storage
+reads, writes, bytes, deletes, System SCORE calls and estimated steps, as counted by the StepMeter of LiquidICX, must
+not exceed the budget in cost_budget.json by more than its "tolerance".
+
+After an intended change of the costs, regenerate the budget with
+    LICX_UPDATE_COST_BUDGET=1 python -m unittest score.liquid_icx.tests.test_cost_budget
+"""
+
+import json
+import os
+import unittest
+
+from iconservice import Address
+
+from score.fake_system_contract.fake_system_contract import FakeSystemContract
+from score.liquid_icx.liquid_icx import LiquidICX
+from score.liquid_icx.scorelib.consts import SYSTEM_SCORE, PREP_ADDRESS
+from score.liquid_icx.scorelib.profiling import meterCounts
+from score.liquid_icx.tests.in_memory_harness import InMemoryHarness
+from score.liquid_icx.tests.simple_test_score.simple_test_score import SimpleTestScore
+
+BUDGET_PATH = os.path.join(os.path.dirname(__file__), "cost_budget.json")
+UPDATE_BUDGET = os.environ.get("LICX_UPDATE_COST_BUDGET") == "1"
+DEFAULT_TOLERANCE = 0.05
+
+LICX_ADDRESS = Address.from_string("cx" + "11" * 20)
+RECEIVER = Address.from_string("cx" + "22" * 20)
+OWNER = Address.from_string("hx" + "aa" * 20)
+ICX = 10 ** 18
+PREP_COUNT = 20
+BACKGROUND_WALLETS = 10
+
+PREPS = [PREP_ADDRESS] + [Address.from_string("hx" + f"{0xbb00 + i:040x}") for i in range(1, PREP_COUNT)]
+# a wallet, which joins for the first time
+NEW = Address.from_string("hx" + "01" * 20)
+# a wallet with one unlocked join delegated to one P-Rep
+FRESH = Address.from_string("hx" + "02" * 20)
+# a wallet with unlocked LICX and 10 pending joins
+PENDING = Address.from_string("hx" + "03" * 20)
+# a wallet delegating to PREP_COUNT P-Reps
+MANY = Address.from_string("hx" + "04" * 20)
+# a wallet receiving the transfers
+OTHER = Address.from_string("hx" + "05" * 20)
+
+
+def _load_budget() -> dict:
+    if not os.path.exists(BUDGET_PATH):
+        return {"tolerance": DEFAULT_TOLERANCE, "budget": {}}
+    with open(BUDGET_PATH) as file:
+        return json.load(file)
+
+
+class CostBudgetTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls._budget = _load_budget()
+        cls._measured = {}
+
+    @classmethod
+    def tearDownClass(cls):
+        if UPDATE_BUDGET and cls._measured:
+            cls._budget["budget"].update(cls._measured)
+            cls._budget["budget"] = dict(sorted(cls._budget["budget"].items()))
+            with open(BUDGET_PATH, "w") as file:
+                json.dump(cls._budget, file, indent=2)
+                file.write("\n")
+
+    def setUp(self):
+        self._harness = InMemoryHarness()
+        self._harness.balances[OWNER] = 10 ** 30
+        self._harness.deploy(FakeSystemContract, SYSTEM_SCORE, OWNER)
+        self._licx = self._harness.deploy(LiquidICX, LICX_ADDRESS, OWNER)
+        self._harness.deploy(SimpleTestScore, RECEIVER, OWNER)
+        self._transact(OWNER, "setCap", _value=10 ** 9)
+        for prep in PREPS[1:]:
+            self._harness.transact(OWNER, SYSTEM_SCORE, "registerPRep", _address=prep, _main=False)
+
+        background = [Address.from_string("hx" + f"{0xcc00 + i:040x}") for i in range(BACKGROUND_WALLETS)]
+        for wallet in background + [NEW, FRESH, PENDING, OTHER, MANY]:
+            self._harness.balances[wallet] = 10000 * ICX
+        for wallet in background + [FRESH, PENDING, OTHER]:
+            self._transact(wallet, "join", 20 * ICX, _delegation=json.dumps({str(PREPS[0]): 20 * ICX}))
+        self._transact(MANY, "join", PREP_COUNT * 20 * ICX,
+                       _delegation=json.dumps({str(prep): 20 * ICX for prep in PREPS}))
+
+        # unlock the joins and leave rewards pending, which are settled by the next write of each wallet
+        self._next_term(2)
+        self._distribute()
+        self._next_term(rewards=10 * ICX)
+        self._distribute()
+
+        for _ in range(9):
+            self._transact(PENDING, "join", 10 * ICX, _delegation=json.dumps({str(PREPS[1]): 10 * ICX}))
+
+    def tearDown(self):
+        self._harness.close()
+
+    # -----------------------------------------------------------------------
+    # ----------------------- testing helper methods ------------------------
+    # -----------------------------------------------------------------------
+    def _transact(self, sender: Address, method: str, value: int = 0, **params):
+        return self._harness.transact(sender, LICX_ADDRESS, method, value, **params)
+
+    def _next_term(self, n: int = 1, rewards: int = 0):
+        for _ in range(n):
+            self._harness.transact(OWNER, SYSTEM_SCORE, "incrementTerm")
+        next_term = self._harness.query(SYSTEM_SCORE, "getIISSInfo")["nextPRepTerm"]
+        self._harness.transact(OWNER, SYSTEM_SCORE, "setBlockHeight", _new_height=next_term - 1)
+        self._harness.transact(OWNER, SYSTEM_SCORE, "setIScore", _i_score=1000 * rewards)
+        self._harness.block_height = next_term - 1
+
+    def _distribute(self):
+        self._transact(OWNER, "distribute")
+        while self._harness.query(LICX_ADDRESS, "getDistributionState")["distributing"]:
+            self._transact(OWNER, "distribute")
+
+    def _delegated(self, wallet: Address) -> int:
+        return sum(self._harness.query(LICX_ADDRESS, "getWallet", _address=wallet)["delegation_values"])
+
+    def _measure(self, entry: str, sender: Address, method: str, value: int = 0, **params):
+        """ Calls a method and compares its counts with the budget of the entry """
+        # readonly methods do not reset the meter themselves
+        self._licx._step_meter.reset()
+        self._transact(sender, method, value, **params)
+        counts = meterCounts(self._licx._step_meter)
+        del counts["transactions"]
+        self._measured[entry] = counts
+        if UPDATE_BUDGET:
+            return
+
+        budget = self._budget["budget"].get(entry)
+        if budget is None:
+            self.fail(f"No budget for {entry}, regenerate {BUDGET_PATH} with LICX_UPDATE_COST_BUDGET=1")
+        tolerance = self._budget.get("tolerance", DEFAULT_TOLERANCE)
+        for field, count in counts.items():
+            with self.subTest(entry=entry, field=field):
+                self.assertLessEqual(count, budget[field] * (1 + tolerance),
+                                     f"{entry} {field} regressed from {budget[field]} to {count}")
+
+    # -----------------------------------------------------------------------
+    # --------------------------------- tests -------------------------------
+    # -----------------------------------------------------------------------
+    def test_0_join(self):
+        self._measure("join/new_wallet", NEW, "join", 20 * ICX, _delegation=json.dumps({str(PREPS[0]): 20 * ICX}))
+        self._measure("join/fresh", FRESH, "join", 20 * ICX, _delegation=json.dumps({str(PREPS[0]): 20 * ICX}))
+        self._measure("join/pending_joins", PENDING, "join", 10 * ICX,
+                      _delegation=json.dumps({str(PREPS[1]): 10 * ICX}))
+        self._measure("join/many_preps", MANY, "join", PREP_COUNT * 10 * ICX,
+                      _delegation=json.dumps({str(prep): 10 * ICX for prep in PREPS}))
+        self._measure("join/no_delegation", NEW, "join", 20 * ICX)
+
+    def test_1_transfer(self):
+        self._measure("transfer/fresh", FRESH, "transfer", _to=OTHER, _value=5 * ICX)
+        self._measure("transfer/new_receiver", FRESH, "transfer", _to=NEW, _value=5 * ICX)
+        self._measure("transfer/pending_joins", PENDING, "transfer", _to=OTHER, _value=5 * ICX)
+        self._measure("transfer/many_preps", MANY, "transfer", _to=OTHER, _value=5 * ICX)
+        self._measure("transfer/contract_receiver", FRESH, "transfer", _to=RECEIVER, _value=5 * ICX)
+
+    def test_2_leave(self):
+        self._measure("leave/fresh", FRESH, "leave")
+        self._measure("leave/pending_joins", PENDING, "leave", _value=10 * ICX)
+        self._measure("leave/many_preps", MANY, "leave", _value=100 * ICX)
+
+    def test_3_vote(self):
+        self._measure("vote/fresh", FRESH, "vote", _delegation=json.dumps({str(PREPS[2]): self._delegated(FRESH)}))
+        self._measure("vote/pending_joins", PENDING, "vote",
+                      _delegation=json.dumps({str(PREPS[2]): self._delegated(PENDING)}))
+        delegated = self._delegated(MANY)
+        delegation = {str(prep): delegated // (PREP_COUNT - 1) for prep in PREPS[1:]}
+        delegation[str(PREPS[1])] += delegated - sum(delegation.values())
+        self._measure("vote/many_preps", MANY, "vote", _delegation=json.dumps(delegation))
+
+    def test_4_claim(self):
+        self._transact(FRESH, "leave")
+        self._transact(MANY, "leave", _value=100 * ICX)
+        self._next_term()
+        self._distribute()
+        unstake_height = self._harness.query(LICX_ADDRESS, "getWallet", _address=MANY)["unstake_heights"][0]
+        self._harness.transact(OWNER, SYSTEM_SCORE, "setBlockHeight", _new_height=unstake_height)
+
+        self._measure("claim/fresh", FRESH, "claim")
+        self._measure("claim/many_preps", MANY, "claim")
+        self._measure("claim/nothing_to_claim", OTHER, "claim")
+
+    def test_5_balance_of(self):
+        self._measure("balanceOf/no_wallet", OTHER, "balanceOf", _owner=NEW)
+        self._measure("balanceOf/pending_rewards", OTHER, "balanceOf", _owner=FRESH)
+        # the transfer settles the rewards of FRESH
+        self._transact(FRESH, "transfer", _to=OTHER, _value=5 * ICX)
+        self._measure("balanceOf/settled", OTHER, "balanceOf", _owner=FRESH)
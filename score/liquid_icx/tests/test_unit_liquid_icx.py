@@ -0,0 +1,435 @@
+import json
+import unittest
+
+from iconservice import Address, IconScoreException
+
+from score.fake_system_contract.fake_system_contract import FakeSystemContract
+from score.liquid_icx.liquid_icx import LiquidICX
+from score.liquid_icx.scorelib.consts import SYSTEM_SCORE, PREP_ADDRESS, MAX_PREP_COUNT
+from score.liquid_icx.tests.in_memory_harness import InMemoryHarness
+
+LICX_ADDRESS = Address.from_string("cx" + "11" * 20)
+OWNER = Address.from_string("hx" + "aa" * 20)
+ICX = 10 ** 18
+
+
+def _wallet_address(index: int) -> Address:
+    return Address.from_string("hx" + f"{index + 1:040x}")
+
+
+class LiquidICXUnitTest(unittest.TestCase):
+    """
+    Runs LiquidICX against the FakeSystemContract in memory, see InMemoryHarness.
+    """
+
+    WALLET_COUNT = 1000
+
+    def setUp(self):
+        self._harness = InMemoryHarness()
+        self._harness.balances[OWNER] = 10 ** 30
+        self._harness.deploy(FakeSystemContract, SYSTEM_SCORE, OWNER)
+        self._licx = self._harness.deploy(LiquidICX, LICX_ADDRESS, OWNER)
+        self._transact(OWNER, "setCap", _value=10 ** 9)
+
+        self._preps = [PREP_ADDRESS] + [Address.from_string("hx" + f"{0xbb00 + i:040x}") for i in range(4)]
+        for prep in self._preps[1:]:
+            self._harness.transact(OWNER, SYSTEM_SCORE, "registerPRep", _address=prep, _main=False)
+
+    def tearDown(self):
+        self._harness.close()
+
+    # -----------------------------------------------------------------------
+    # ----------------------- testing helper methods ------------------------
+    # -----------------------------------------------------------------------
+    def _transact(self, sender: Address, method: str, value: int = 0, **params):
+        return self._harness.transact(sender, LICX_ADDRESS, method, value, **params)
+
+    def _query(self, method: str, **params):
+        return self._harness.query(LICX_ADDRESS, method, **params)
+
+    def _join_wallets(self, count: int, value: int = 11 * ICX) -> list:
+        wallets = [_wallet_address(i) for i in range(count)]
+        for i, wallet in enumerate(wallets):
+            self._harness.balances[wallet] = 1000 * ICX
+            prep = self._preps[i % len(self._preps)]
+            self._transact(wallet, "join", value, _delegation=json.dumps({str(prep): value}))
+        return wallets
+
+    def _increment_term(self, n: int = 1):
+        for _ in range(n):
+            self._harness.transact(OWNER, SYSTEM_SCORE, "incrementTerm")
+        next_term = self._harness.query(SYSTEM_SCORE, "getIISSInfo")["nextPRepTerm"]
+        self._harness.transact(OWNER, SYSTEM_SCORE, "setBlockHeight", _new_height=next_term - 1)
+        self._harness.block_height = next_term - 1
+
+    def _distribute(self) -> int:
+        calls = 0
+        while not calls or self._query("getDistributionState")["distributing"]:
+            self._transact(OWNER, "distribute")
+            calls += 1
+        return calls
+
+    def _assert_delegations_match_wallets(self, wallets: list):
+        score_delegations = {prep: self._licx._delegation[prep] for prep in self._licx._delegation_keys}
+        wallet_delegations = {}
+        for wallet in wallets:
+            result = self._query("getWallet", _address=wallet)
+            for prep, value in zip(result["delegation_addr"], result["delegation_values"]):
+                wallet_delegations[prep] = wallet_delegations.get(prep, 0) + value
+        self.assertEqual(score_delegations, wallet_delegations)
+
+    # -----------------------------------------------------------------------
+    # --------------------------------- tests -------------------------------
+    # -----------------------------------------------------------------------
+    def test_0_join_distribute_leave_claim(self):
+        """
+        1. Join with WALLET_COUNT wallets and check the locked amounts
+        2. Increment term by 2, set rewards and distribute, the joined LICX are unlocked
+        3. Distribute rewards, leave with the first wallet and distribute in the next term
+        4. Claim the ICX of the first wallet after the unstaking period
+        """
+        # 1
+        iteration_limit = 100
+        rewards = 100 * ICX
+        self._transact(OWNER, "setIterationLimit", _iteration_limit=iteration_limit)
+        wallets = self._join_wallets(self.WALLET_COUNT)
+        self.assertEqual(self.WALLET_COUNT, len(self._query("getWallets")))
+        self.assertEqual(11 * ICX, self._query("lockedOf", _owner=wallets[0]))
+        self.assertEqual(0, self._query("balanceOf", _owner=wallets[0]))
+        # 2
+        self._increment_term(2)
+        self._harness.transact(OWNER, SYSTEM_SCORE, "setIScore", _i_score=1000 * rewards)
+        calls = self._distribute()
+        self.assertEqual(-(-self.WALLET_COUNT // iteration_limit), calls)
+        self.assertEqual(self.WALLET_COUNT * 11 * ICX + rewards, self._query("totalSupply"))
+        self.assertEqual(11 * ICX, self._query("balanceOf", _owner=wallets[0]))
+        self.assertEqual(1, len(self._harness.events_of("Distribute(int)")))
+        self.assertEqual([], self._query("getPendingWallets"))
+        self._assert_delegations_match_wallets(wallets)
+        # 3
+        self._increment_term()
+        self._harness.transact(OWNER, SYSTEM_SCORE, "setIScore", _i_score=1000 * rewards)
+        self._distribute()
+        balance = self._query("balanceOf", _owner=wallets[0])
+        self.assertGreater(balance, 11 * ICX)
+        self._transact(wallets[0], "leave")
+        self._increment_term()
+        self._distribute()
+        wallet = self._query("getWallet", _address=wallets[0])
+        self.assertEqual([balance], wallet["leave_values"])
+        self.assertEqual(1, len(wallet["unstake_heights"]))
+        self.assertEqual(self.WALLET_COUNT - 1, len(self._query("getWallets")))
+        # 4
+        self._harness.transact(OWNER, SYSTEM_SCORE, "setBlockHeight", _new_height=wallet["unstake_heights"][0])
+        icx_before = self._harness.balances[wallets[0]]
+        self._transact(wallets[0], "claim")
+        self.assertEqual(icx_before + balance, self._harness.balances[wallets[0]])
+
+    def test_1_transfer_vote_keep_delegations_consistent(self):
+        """
+        1. Join with 20 wallets and distribute
+        2. Transfer between wallets, to a new wallet and vote for other P-Reps
+        3. The SCORE's delegations equal the sum of the wallets' delegations
+        """
+        # 1
+        wallets = self._join_wallets(20)
+        self._increment_term(2)
+        self._distribute()
+        # 2
+        for i in range(0, 10, 2):
+            self._transact(wallets[i], "transfer", _to=wallets[i + 1], _value=3 * ICX)
+        new_wallet = _wallet_address(100)
+        self._transact(wallets[10], "transfer", _to=new_wallet, _value=5 * ICX)
+        for i in range(11, 20, 3):
+            self._transact(wallets[i], "vote", _delegation=json.dumps({str(self._preps[-1]): 11 * ICX}))
+        # 3
+        self.assertEqual(5 * ICX, self._query("balanceOf", _owner=new_wallet))
+        self._assert_delegations_match_wallets(wallets + [new_wallet])
+        delegation = self._harness.query(SYSTEM_SCORE, "getDelegation", address=LICX_ADDRESS)
+        self.assertEqual(self._query("totalSupply"), delegation["totalDelegated"])
+
+    def test_2_upgraded_legacy_holder_earns_rewards(self):
+        """
+        1. Join with two wallets and distribute
+        2. Remove the reward index and balance record of the first wallet, as a holder of the previous version
+           has none, update the SCORE. Distribute is blocked, until the wallets are migrated
+        3. Distribute rewards, both wallets earn the same rewards
+        4. Transfer from the legacy holder, the total supply equals the sum of the balances
+        """
+        # 1
+        wallets = self._join_wallets(2, 100 * ICX)
+        self._increment_term(2)
+        self._distribute()
+        # 2
+        def __remove_reward_index(licx: LiquidICX):
+            licx._getWallet(wallets[0])._reward_index.remove()
+            del licx._balance_records[wallets[0]]
+            licx._migration_cursor.remove()
+
+        self._harness.execute(LICX_ADDRESS, __remove_reward_index)
+        self._transact(OWNER, "on_update")
+        self._increment_term()
+        with self.assertRaises(IconScoreException):
+            self._transact(OWNER, "distribute")
+        self._transact(OWNER, "migrateWallets", _limit=10)
+        # 3
+        self._harness.transact(OWNER, SYSTEM_SCORE, "setIScore", _i_score=1000 * 20 * ICX)
+        self._distribute()
+        self.assertEqual(110 * ICX, self._query("balanceOf", _owner=wallets[0]))
+        self.assertEqual(110 * ICX, self._query("balanceOf", _owner=wallets[1]))
+        # 4
+        self._transact(wallets[0], "transfer", _to=wallets[1], _value=10 * ICX)
+        self.assertEqual(100 * ICX, self._query("balanceOf", _owner=wallets[0]))
+        self.assertEqual(120 * ICX, self._query("balanceOf", _owner=wallets[1]))
+        self.assertEqual(self._query("totalSupply"), sum(self._query("balanceOf", _owner=wallet) for wallet in wallets))
+
+    def test_3_rewards_are_delegated_like_the_wallets(self):
+        """
+        1. Join with the first wallet and distribute, join with the second wallet, which stays locked
+        2. Distribute rewards, they are delegated as unsettled rewards
+        3. Settle the rewards of the first wallet, the SCORE's delegations equal the ones of the wallets
+        """
+        # 1
+        wallets = [_wallet_address(0), _wallet_address(1)]
+        for wallet in wallets:
+            self._harness.balances[wallet] = 1000 * ICX
+        self._transact(wallets[0], "join", 100 * ICX, _delegation=json.dumps({str(self._preps[0]): 100 * ICX}))
+        self._increment_term(2)
+        self._distribute()
+        self._transact(wallets[1], "join", 100 * ICX, _delegation=json.dumps({str(self._preps[1]): 100 * ICX}))
+        # 2
+        self._increment_term()
+        self._harness.transact(OWNER, SYSTEM_SCORE, "setIScore", _i_score=1000 * 10 * ICX)
+        self._distribute()
+        self.assertEqual(10 * ICX, self._licx._unsettled_rewards.get())
+        delegation = self._harness.query(SYSTEM_SCORE, "getDelegation", address=LICX_ADDRESS)
+        self.assertEqual(210 * ICX, delegation["totalDelegated"])
+        # 3
+        self._transact(wallets[0], "transfer", _to=_wallet_address(2), _value=0)
+        self.assertEqual(0, self._licx._unsettled_rewards.get())
+        self.assertEqual({self._preps[0]: 110 * ICX, self._preps[1]: 100 * ICX},
+                         {prep: self._licx._delegation[prep] for prep in self._licx._delegation_keys})
+        self._assert_delegations_match_wallets(wallets)
+        delegation = self._harness.query(SYSTEM_SCORE, "getDelegation", address=LICX_ADDRESS)
+        self.assertEqual(210 * ICX, delegation["totalDelegated"])
+
+    def test_4_join_batch_delegations(self):
+        """
+        1. Join a batch with delegations passed as an object with hex values and as a JSON string
+        2. A delegation, which is not an object, reverts
+        """
+        # 1
+        wallets = [_wallet_address(0), _wallet_address(1)]
+        entries = [
+            {"address": str(wallets[0]), "amount": hex(10 * ICX), "delegation": {str(self._preps[1]): hex(10 * ICX)}},
+            {"address": str(wallets[1]), "amount": 20 * ICX,
+             "delegation": json.dumps({str(self._preps[2]): str(20 * ICX)})}
+        ]
+        self._transact(OWNER, "joinBatch", 30 * ICX, _entries=json.dumps(entries))
+        self.assertEqual({self._preps[1]: 10 * ICX, self._preps[2]: 20 * ICX},
+                         {prep: self._licx._delegation[prep] for prep in self._licx._delegation_keys})
+        self._assert_delegations_match_wallets(wallets)
+        # 2
+        entries = [{"address": str(_wallet_address(2)), "amount": 10 * ICX, "delegation": [str(self._preps[1])]}]
+        with self.assertRaises(IconScoreException):
+            self._transact(OWNER, "joinBatch", 10 * ICX, _entries=json.dumps(entries))
+
+    def test_5_wallets_page(self):
+        """
+        1. Page through the wallets with the returned cursor
+        2. A cursor, which is no node ID of a wallet, reverts
+        """
+        # 1
+        wallets = self._join_wallets(5)
+        page = self._query("getWalletsPage", _limit=3)
+        self.assertEqual(wallets[:3], page["wallets"])
+        page = self._query("getWalletsPage", _cursor=page["next"], _limit=3)
+        self.assertEqual(wallets[3:], page["wallets"])
+        self.assertEqual(0, page["next"])
+        # 2
+        with self.assertRaises(IconScoreException):
+            self._query("getWalletsPage", _cursor=1000)
+
+    def test_6_wallet_is_deleted_after_leaving(self):
+        """
+        1. Join with packed wallets, distribute rewards and leave with the whole balance of the first wallet
+        2. After claiming its ICX, the record of the first wallet is deleted
+        """
+        # 1
+        self._transact(OWNER, "enablePackedWallets")
+        wallets = self._join_wallets(2)
+        self._increment_term(2)
+        self._distribute()
+        self._increment_term()
+        self._harness.transact(OWNER, SYSTEM_SCORE, "setIScore", _i_score=1000 * 10 * ICX)
+        self._distribute()
+        self._transact(wallets[0], "leave")
+        self._increment_term()
+        self._distribute()
+        # 2
+        wallet = self._query("getWallet", _address=wallets[0])
+        self._harness.transact(OWNER, SYSTEM_SCORE, "setBlockHeight", _new_height=wallet["unstake_heights"][0])
+        self._transact(wallets[0], "claim")
+        self.assertTrue(self._licx._getWallet(wallets[0]).isEmpty())
+        self.assertIsNone(self._licx._getWallet(wallets[0])._records[wallets[0]])
+        self.assertIsNone(self._licx._balance_records[wallets[0]])
+        self.assertIsNotNone(self._licx._getWallet(wallets[1])._records[wallets[1]])
+
+    def test_7_preps_are_refreshed_each_term(self):
+        """
+        1. Join to refresh the P-Reps and unregister two sub P-Reps. They are accepted until the term ends
+        2. In the next term, the unregistered P-Reps are not accepted anymore
+        3. At most MAX_PREP_COUNT P-Reps are kept
+        """
+        # 1
+        wallets = [_wallet_address(i) for i in range(3)]
+        for wallet in wallets:
+            self._harness.balances[wallet] = 1000 * ICX
+        self._transact(wallets[0], "join", 10 * ICX, _delegation=json.dumps({str(self._preps[0]): 10 * ICX}))
+
+        def __unregister(system_score: FakeSystemContract):
+            system_score._sub_preps.pop()
+            system_score._sub_preps.pop()
+
+        self._harness.execute(SYSTEM_SCORE, __unregister)
+        self._transact(wallets[1], "join", 10 * ICX, _delegation=json.dumps({str(self._preps[-2]): 10 * ICX}))
+        # 2
+        self._increment_term()
+        with self.assertRaises(IconScoreException):
+            self._transact(wallets[2], "join", 10 * ICX, _delegation=json.dumps({str(self._preps[-1]): 10 * ICX}))
+        # 3
+        for i in range(MAX_PREP_COUNT):
+            prep = Address.from_string("hx" + f"{0xdd00 + i:040x}")
+            self._harness.transact(OWNER, SYSTEM_SCORE, "registerPRep", _address=prep, _main=False)
+        self._increment_term()
+        self._transact(OWNER, "refreshPReps")
+        preps = self._query("getPReps")
+        self.assertEqual(MAX_PREP_COUNT, len(preps))
+        self.assertEqual(self._preps[:-2], preps[:len(self._preps) - 2])
+        self.assertNotIn(self._preps[-1], preps)
+
+    def test_8_distribution_state(self):
+        """
+        1. Join with 10 wallets and distribute the first 4 of them
+        2. A wallet, which joins while distributing, is added to the wallets of the cycle and processed by it
+        3. With a step budget, the estimated calls are based on the steps per wallet processed so far
+        """
+        # 1
+        self._transact(OWNER, "setIterationLimit", _iteration_limit=4)
+        self._join_wallets(10)
+        self._increment_term(2)
+        self._transact(OWNER, "distribute")
+        state = self._query("getDistributionState")
+        self.assertEqual((4, 6, 2), (state["processed"], state["remaining"], state["estimated_calls"]))
+        # 2
+        new_wallet = _wallet_address(100)
+        self._harness.balances[new_wallet] = 1000 * ICX
+        self._transact(new_wallet, "join", 11 * ICX)
+        state = self._query("getDistributionState")
+        self.assertEqual((4, 7, 2), (state["processed"], state["remaining"], state["estimated_calls"]))
+        # 3
+        wallet_steps = self._licx._distribute_wallet_steps.get()
+        self.assertGreater(wallet_steps, 0)
+        self._transact(OWNER, "setStepBudget", _step_budget=wallet_steps // 4 * 2)
+        self.assertEqual(4, self._query("getDistributionState")["estimated_calls"])
+        self._transact(OWNER, "setStepBudget", _step_budget=0)
+        self._distribute()
+        state = self._query("getDistributionState")
+        # the join of the new wallet is still locked, so it stays pending for the next cycle
+        self.assertEqual((11, 1), (state["processed"], state["remaining"]))
+
+    def test_9_delegation_call_stats(self):
+        """
+        1. Without profiling, the setDelegation calls are not counted
+        2. While profiling, a transfer keeps the delegations and skips the call, a join with a new P-Rep sends it
+        """
+        # 1
+        wallets = self._join_wallets(2)
+        self.assertEqual({"sent": 0, "skipped": 0}, self._query("getDelegationCallStats"))
+        self._increment_term(2)
+        self._distribute()
+        # 2
+        self._transact(OWNER, "setProfiling", _enabled=True)
+        self._transact(wallets[0], "transfer", _to=wallets[1], _value=0)
+        self.assertEqual({"sent": 0, "skipped": 1}, self._query("getDelegationCallStats"))
+        self._transact(wallets[0], "join", 11 * ICX, _delegation=json.dumps({str(self._preps[2]): 11 * ICX}))
+        self.assertEqual({"sent": 1, "skipped": 1}, self._query("getDelegationCallStats"))
+
+    def test_10_update_while_distributing(self):
+        """
+        1. Join with 10 wallets and distribute the first 4 of them, the update is reverted
+        2. Finish the distribute cycle, the SCORE can be updated
+        """
+        # 1
+        self._transact(OWNER, "setIterationLimit", _iteration_limit=4)
+        wallets = self._join_wallets(10)
+        self._increment_term(2)
+        self._transact(OWNER, "distribute")
+        cursor = self._licx._current_distribute_linked_list_id.get()
+        with self.assertRaises(IconScoreException):
+            self._transact(OWNER, "on_update")
+        self.assertTrue(self._query("getDistributionState")["distributing"])
+        self.assertEqual(cursor, self._licx._current_distribute_linked_list_id.get())
+        # 2
+        self._distribute()
+        self._transact(OWNER, "on_update")
+        self.assertEqual(10 * 11 * ICX, self._query("totalSupply"))
+        self.assertEqual(11 * ICX, self._query("balanceOf", _owner=wallets[9]))
+
+    def test_11_cycle_is_closed_after_all_wallets_left(self):
+        """
+        1. Join with 2 wallets, distribute and leave with both of them
+        2. With a step budget, each call processes one wallet and the call, which removes the last wallet, leaves the
+           cycle open. The next call closes it, although no wallets are left
+        """
+        # 1
+        wallets = self._join_wallets(2)
+        self._increment_term(2)
+        self._distribute()
+        for wallet in wallets:
+            self._transact(wallet, "leave")
+        # 2
+        self._increment_term()
+        self._transact(OWNER, "setStepBudget", _step_budget=1)
+        self.assertEqual(3, self._distribute())
+        self.assertEqual([], self._query("getWallets"))
+        self.assertFalse(self._query("getDistributionState")["distributing"])
+
+    def test_12_multicall_reverts_with_the_index_of_the_call(self):
+        """
+        1. Multicall returns the results of the calls in order
+        2. An invalid address and an unknown node ID are reverted with the index of their call
+        """
+        # 1
+        wallets = self._join_wallets(1)
+        calls = [{"method": "lockedOf", "params": {"_owner": str(wallets[0])}},
+                 {"method": "getWalletByNodeID", "params": {"_node_id": "0x1"}}]
+        self.assertEqual([11 * ICX, wallets[0]], self._query("multicall", _calls=json.dumps(calls)))
+        # 2
+        calls = [{"method": "name"}, {"method": "balanceOf", "params": {"_owner": "hx123"}}]
+        with self.assertRaisesRegex(IconScoreException, r"^multicall\[1\]: LiquidICX: Invalid param hx123\."):
+            self._query("multicall", _calls=json.dumps(calls))
+        calls = [{"method": "getWalletByNodeID", "params": {"_node_id": 1000}}]
+        with self.assertRaisesRegex(IconScoreException, r"^multicall\[0\]: LiquidICX: Node ID"):
+            self._query("multicall", _calls=json.dumps(calls))
+
+    def test_13_owner_methods_and_icx_transfers_are_profiled(self):
+        """
+        1. While profiling, a setter of the owner is profiled
+        2. The ICX transfer of claim is counted as a call, next to the call to the System SCORE
+        """
+        # 1
+        wallets = self._join_wallets(1)
+        self._increment_term(2)
+        self._distribute()
+        self._transact(OWNER, "setProfiling", _enabled=True)
+        self._transact(OWNER, "setIterationLimit", _iteration_limit=10)
+        self.assertEqual(1, self._query("getProfile")["setIterationLimit"]["transactions"])
+        # 2
+        self._transact(wallets[0], "leave")
+        self._increment_term()
+        self._distribute()
+        wallet = self._query("getWallet", _address=wallets[0])
+        self._harness.transact(OWNER, SYSTEM_SCORE, "setBlockHeight", _new_height=wallet["unstake_heights"][0])
+        self._transact(wallets[0], "claim")
+        self.assertEqual(2, self._query("getProfile")["claim"]["calls"])
@@ -0,0 +1,330 @@
+import unittest
+
+from iconservice import Address, ArrayDB, DictDB
+
+from score.liquid_icx.scorelib.indexed_set import IndexedSetDB
+from score.liquid_icx.scorelib.iterable_dict import IterableDictDB
+from score.liquid_icx.scorelib.linked_list import LinkedListDB, LinkedNodeNotFound, _NodeDB
+from score.liquid_icx.scorelib.queue import QueueDB, EmptyQueueException
+from score.liquid_icx.scorelib.packing import PackWriter, PackReader, PackError
+from score.liquid_icx.tests.in_memory_harness import InMemoryHarness, MemoryDatabase
+
+SCORE_ADDRESS = Address.from_string("cx" + "11" * 20)
+
+
+def _address(index: int) -> Address:
+    return Address.from_string("hx" + f"{index + 1:040x}")
+
+
+class ScorelibTestCase(unittest.TestCase):
+    """
+    Runs the containers of scorelib on a MemoryDatabase, the InMemoryHarness provides the writable context.
+    """
+
+    def setUp(self):
+        self._harness = InMemoryHarness()
+        self._db = MemoryDatabase(SCORE_ADDRESS, self._harness.store, SCORE_ADDRESS.to_bytes())
+
+    def tearDown(self):
+        self._harness.close()
+
+
+class PackingTest(ScorelibTestCase):
+
+    def test_0_int_round_trip(self):
+        values = [0, 1, -1, 127, 128, -128, -129, 255, 256, 10 ** 18, -10 ** 18, 2 ** 255, -2 ** 255, 10 ** 600]
+        writer = PackWriter()
+        for value in values:
+            writer.write_int(value)
+        reader = PackReader(writer.to_bytes())
+        self.assertEqual(values, [reader.read_int() for _ in values])
+        self.assertTrue(reader.at_end())
+
+    def test_1_value_round_trip(self):
+        record = PackWriter() \
+            .write_value(_address(0), Address) \
+            .write_value(Address.from_string("cx" + "22" * 20), Address) \
+            .write_value("wallet", str) \
+            .write_value(b"\x00\xff", bytes) \
+            .write_ints([3, -2, 10 ** 20]) \
+            .write_ints([]) \
+            .to_bytes()
+        reader = PackReader(record)
+        self.assertEqual(_address(0), reader.read_value(Address))
+        self.assertEqual(Address.from_string("cx" + "22" * 20), reader.read_value(Address))
+        self.assertEqual("wallet", reader.read_value(str))
+        self.assertEqual(b"\x00\xff", reader.read_value(bytes))
+        self.assertEqual([3, -2, 10 ** 20], reader.read_ints())
+        self.assertEqual([], reader.read_ints())
+        self.assertTrue(reader.at_end())
+
+    def test_2_errors(self):
+        with self.assertRaises(PackError):
+            PackWriter().write_int(2 ** (8 * 0xff))
+        with self.assertRaises(PackError):
+            PackWriter().write_value(1.5, float)
+        with self.assertRaises(PackError):
+            PackReader(PackWriter().write_int(10 ** 18).to_bytes()[:-1]).read_int()
+
+
+class IndexedSetTest(ScorelibTestCase):
+
+    def test_0_add_remove(self):
+        indexed_set = IndexedSetDB("set", self._db, Address)
+        self.assertTrue(all(indexed_set.add(_address(i)) for i in range(4)))
+        self.assertFalse(indexed_set.add(_address(1)))
+        self.assertEqual([_address(i) for i in range(4)], list(indexed_set))
+
+        # the last item takes the position of the removed one
+        self.assertTrue(indexed_set.remove(_address(1)))
+        self.assertFalse(indexed_set.remove(_address(1)))
+        self.assertEqual([_address(0), _address(3), _address(2)], list(indexed_set))
+        self.assertNotIn(_address(1), indexed_set)
+        self.assertIn(_address(3), indexed_set)
+        self.assertTrue(indexed_set.remove(_address(2)))
+        self.assertEqual([_address(0), _address(3)], list(indexed_set))
+
+        # an item is added again after it was removed
+        self.assertTrue(indexed_set.add(_address(1)))
+        self.assertEqual([_address(0), _address(3), _address(1)], list(indexed_set))
+        for item in [_address(0), _address(3), _address(1)]:
+            self.assertTrue(indexed_set.remove(item))
+        self.assertEqual(0, len(indexed_set))
+        self.assertNotIn(_address(0), indexed_set)
+
+    def test_1_reindex(self):
+        """ An ArrayDB written with the same key becomes an IndexedSetDB after reindex """
+        array = ArrayDB("set", self._db, Address)
+        for i in range(3):
+            array.put(_address(i))
+        indexed_set = IndexedSetDB("set", self._db, Address)
+        self.assertNotIn(_address(1), indexed_set)
+        indexed_set.reindex()
+        self.assertIn(_address(1), indexed_set)
+        self.assertFalse(indexed_set.add(_address(2)))
+        self.assertTrue(indexed_set.remove(_address(0)))
+        self.assertEqual([_address(2), _address(1)], list(indexed_set))
+
+
+class QueueTest(ScorelibTestCase):
+
+    def test_0_put_pop_front(self):
+        queue = QueueDB("queue", self._db, int)
+        for value in [10, -20, 30]:
+            queue.put(value)
+        self.assertEqual(10, queue.pop_front())
+        queue.put(40)
+        self.assertEqual([-20, 30, 40], list(queue))
+        self.assertEqual(3, len(queue))
+
+        # indexes are relative to the head
+        self.assertEqual(-20, queue.peek())
+        self.assertEqual(-20, queue[0])
+        self.assertEqual(40, queue[-1])
+        queue[1] = 35
+        self.assertEqual([-20, 35, 40], list(queue))
+        with self.assertRaises(IndexError):
+            queue[3]
+        with self.assertRaises(IndexError):
+            queue[-4] = 0
+
+        self.assertEqual([-20, 35, 40], [queue.pop_front() for _ in range(3)])
+        self.assertEqual(0, len(queue))
+        with self.assertRaises(EmptyQueueException):
+            queue.peek()
+        with self.assertRaises(EmptyQueueException):
+            queue.pop_front()
+
+    def test_1_items_are_deleted_once_empty(self):
+        queue = QueueDB("queue", self._db, int)
+        array = ArrayDB("queue", self._db, int)
+        queue.put(1)
+        queue.put(2)
+        queue.pop_front()
+        self.assertEqual(2, len(array))
+        queue.pop_front()
+        self.assertEqual(0, len(array))
+
+        # the queue is used again after it was emptied
+        queue.put(3)
+        self.assertEqual([3], list(queue))
+        self.assertEqual(3, queue.peek())
+        queue.clear()
+        self.assertEqual(0, len(queue))
+        self.assertEqual(0, len(array))
+
+    def test_2_existing_array(self):
+        """ An ArrayDB written with the same key is read as a QueueDB """
+        array = ArrayDB("queue", self._db, int)
+        for value in [1, 2, 3]:
+            array.put(value)
+        queue = QueueDB("queue", self._db, int)
+        self.assertEqual(1, queue.pop_front())
+        self.assertEqual([2, 3], list(queue))
+
+
+class IterableDictTest(ScorelibTestCase):
+
+    def test_0_set_delete(self):
+        iterable_dict = IterableDictDB("dict", self._db, Address, int)
+        for i in range(3):
+            iterable_dict[_address(i)] = (i + 1) * 10
+        iterable_dict[_address(1)] += 5
+        self.assertEqual([(_address(0), 10), (_address(1), 25), (_address(2), 30)], iterable_dict.items())
+
+        del iterable_dict[_address(0)]
+        del iterable_dict[_address(0)]
+        self.assertEqual([_address(2), _address(1)], iterable_dict.keys())
+        self.assertNotIn(_address(0), iterable_dict)
+        self.assertEqual(0, iterable_dict[_address(0)])
+        self.assertIsNone(iterable_dict.get(_address(0)))
+        self.assertEqual(25, iterable_dict.get(_address(1)))
+
+        # a key is set again after it was deleted
+        iterable_dict[_address(0)] = 1
+        self.assertEqual([(_address(2), 30), (_address(1), 25), (_address(0), 1)], iterable_dict.items())
+        self.assertEqual(3, len(iterable_dict))
+
+        iterable_dict.clear()
+        self.assertEqual(0, len(iterable_dict))
+        self.assertEqual([], iterable_dict.items())
+        self.assertEqual(0, iterable_dict[_address(1)])
+
+    def test_1_reindex(self):
+        """ Keys written as an ArrayDB with the same key and values in a DictDB become an IterableDictDB """
+        keys = ArrayDB("dict", self._db, Address)
+        for i in range(2):
+            keys.put(_address(i))
+        iterable_dict = IterableDictDB("dict", self._db, Address, int)
+        iterable_dict.reindex()
+        iterable_dict[_address(1)] = 5
+        iterable_dict[_address(2)] = 7
+        self.assertEqual([_address(0), _address(1), _address(2)], iterable_dict.keys())
+        del iterable_dict[_address(0)]
+        self.assertEqual([(_address(2), 7), (_address(1), 5)], iterable_dict.items())
+
+
+class LinkedListTest(ScorelibTestCase):
+    """
+    Runs each test on a LinkedListDB with four entries per node and on a packed one
+    """
+
+    def _lists(self) -> list:
+        return [LinkedListDB("plain", self._db, Address), LinkedListDB("packed", self._db, Address, packed=True)]
+
+    def _build(self, linked_list: LinkedListDB, count: int) -> list:
+        return [linked_list.append(_address(i)) for i in range(count)]
+
+    def _assert_order(self, linked_list: LinkedListDB, node_ids: list):
+        """ Checks the order of the nodes in both directions and the length of the list """
+        self.assertEqual(node_ids, [node_id for node_id, _ in linked_list])
+        self.assertEqual(len(node_ids), len(linked_list))
+        backwards = []
+        node_id = linked_list._tail_id.get()
+        while node_id:
+            backwards.append(node_id)
+            node_id = linked_list._get_node(node_id).get_prev()
+        self.assertEqual(node_ids[::-1], backwards)
+
+    def test_0_append_prepend_remove(self):
+        for linked_list in self._lists():
+            with self.subTest(packed=linked_list._packed_nodes is not None):
+                ids = self._build(linked_list, 3)
+                head_id = linked_list.prepend(_address(10))
+                self._assert_order(linked_list, [head_id] + ids)
+                self.assertEqual(_address(10), linked_list.head_value())
+                self.assertEqual(_address(2), linked_list.tail_value())
+
+                linked_list.remove(ids[1])
+                self._assert_order(linked_list, [head_id, ids[0], ids[2]])
+                linked_list.remove(head_id)
+                linked_list.remove(ids[2])
+                self._assert_order(linked_list, [ids[0]])
+                with self.assertRaises(LinkedNodeNotFound):
+                    linked_list.node_value(ids[1])
+
+                new_id = linked_list.append_after(_address(11), ids[0])
+                other_id = linked_list.prepend_before(_address(12), ids[0])
+                self._assert_order(linked_list, [other_id, ids[0], new_id])
+                linked_list.clear()
+                self._assert_order(linked_list, [])
+
+    def test_1_move(self):
+        for linked_list in self._lists():
+            with self.subTest(packed=linked_list._packed_nodes is not None):
+                ids = self._build(linked_list, 5)
+                # the node after the moved one is also the node to move it after
+                linked_list.move_node_after(ids[1], ids[2])
+                order = [ids[0], ids[2], ids[1], ids[3], ids[4]]
+                self._assert_order(linked_list, order)
+                # the node before the moved one is also the node to move it before
+                linked_list.move_node_before(ids[3], ids[1])
+                order = [ids[0], ids[2], ids[3], ids[1], ids[4]]
+                self._assert_order(linked_list, order)
+                # the moved node is the head and the tail
+                linked_list.move_node_after(ids[0], ids[1])
+                linked_list.move_node_before(ids[4], ids[3])
+                order = [ids[2], ids[4], ids[3], ids[1], ids[0]]
+                self._assert_order(linked_list, order)
+                self.assertEqual([_address(2), _address(4), _address(3), _address(1), _address(0)],
+                                 [value for _, value in linked_list])
+
+    def test_2_move_tail_head(self):
+        for linked_list in self._lists():
+            with self.subTest(packed=linked_list._packed_nodes is not None):
+                ids = self._build(linked_list, 4)
+                # the node after the moved one is the tail
+                linked_list.move_node_tail(ids[2])
+                self._assert_order(linked_list, [ids[0], ids[1], ids[3], ids[2]])
+                # the node before the moved one is the head
+                linked_list.move_node_head(ids[1])
+                self._assert_order(linked_list, [ids[1], ids[0], ids[3], ids[2]])
+                # the moved node is the head and the tail
+                linked_list.move_node_tail(ids[1])
+                linked_list.move_node_head(ids[1])
+                self._assert_order(linked_list, [ids[1], ids[0], ids[3], ids[2]])
+                # through move_node_after and move_node_before
+                linked_list.move_node_after(ids[0], ids[2])
+                linked_list.move_node_before(ids[2], ids[1])
+                self._assert_order(linked_list, [ids[2], ids[1], ids[3], ids[0]])
+
+                linked_list.remove(ids[1])
+                linked_list.remove(ids[3])
+                linked_list.move_node_tail(ids[2])
+                self._assert_order(linked_list, [ids[0], ids[2]])
+                linked_list.move_node_head(ids[2])
+                self._assert_order(linked_list, [ids[2], ids[0]])
+
+    def test_3_page(self):
+        for linked_list in self._lists():
+            with self.subTest(packed=linked_list._packed_nodes is not None):
+                self.assertEqual(([], 0), linked_list.page(0, 10))
+                ids = self._build(linked_list, 5)
+                head_id = linked_list.prepend(_address(10))
+                items, next_id = linked_list.page(0, 4)
+                self.assertEqual([(head_id, _address(10))] + [(ids[i], _address(i)) for i in range(3)], items)
+                self.assertEqual(ids[3], next_id)
+                items, next_id = linked_list.page(next_id, 4)
+                self.assertEqual([(ids[3], _address(3)), (ids[4], _address(4))], items)
+                self.assertEqual(0, next_id)
+                with self.assertRaises(LinkedNodeNotFound):
+                    linked_list.page(1000, 4)
+
+    def test_4_packed_reads_legacy_nodes(self):
+        """
+        Nodes written with four entries and str values are read by a packed list and packed, once they are written
+        """
+        legacy = LinkedListDB("wallets", self._db, str)
+        ids = [legacy.append(str(_address(i))) for i in range(3)]
+        linked_list = LinkedListDB("wallets", self._db, Address, packed=True, legacy_value_type=str)
+        self.assertEqual([(node_id, _address(i)) for i, node_id in enumerate(ids)], list(linked_list))
+
+        linked_list.pack_node(ids[0])
+        linked_list.remove(ids[1])
+        head_id = linked_list.prepend(_address(10))
+        self._assert_order(linked_list, [head_id, ids[0], ids[2]])
+        records = DictDB(f"{linked_list._name}_packed_nodes", self._db, bytes)
+        for node_id in ids:
+            self.assertFalse(_NodeDB(str(node_id) + linked_list._name, self._db, str, node_id).exists())
+        self.assertIsNone(records[ids[1]])
+        self.assertEqual(_address(2), linked_list.tail_value())
@@ -1,28 +1,58 @@
 from .scorelib.utils import *
+from .scorelib.queue import *
+from .scorelib.iterable_dict import *
 
 
 class Wallet:
-    __sys_score = IconScoreBase.create_interface_score(SYSTEM_SCORE, InterfaceSystemScore)
+    """
+    Handle to the storage of a wallet. The containers are created on their first access,
+    so a handle only costs what the entry point actually reads or writes.
+    """
 
-    def __init__(self, db: IconScoreDatabase, _address: Address):
-        self._address = _address
-        self._locked = VarDB("locked_" + str(_address), db, value_type=int)
-        self._unstaking = VarDB("unstaking_" + str(_address), db, value_type=int)
+    __slots__ = ('_db', '_address', '_key', '_locked', '_unstaking', '_join_values', '_unlock_heights',
+                 '_leave_values', '_unstake_heights', '_node_id', '_pending_id', '_reward_index', '_delegations',
+                 '_legacy_delegation_value')
+
+    _CONTAINERS = {
+        '_locked': lambda key, db: VarDB("locked_" + key, db, value_type=int),
+        '_unstaking': lambda key, db: VarDB("unstaking_" + key, db, value_type=int),
 
         # Presents how much user deposited to SCORE in chronological order
-        self._join_values = ArrayDB("join_values_" + str(_address), db, value_type=int)
-        self._unlock_heights = ArrayDB("unlock_heights" + str(_address), db, value_type=int)
+        '_join_values': lambda key, db: QueueDB("join_values_" + key, db, value_type=int),
+        '_unlock_heights': lambda key, db: QueueDB("unlock_heights" + key, db, value_type=int),
 
         # Presents with how much LICX user wants to leave in chronological order
-        self._leave_values = ArrayDB("leave_values_" + str(_address), db, value_type=int)
-        self._unstake_heights = ArrayDB("unstake_heights_" + str(_address), db, value_type=int)
+        '_leave_values': lambda key, db: QueueDB("leave_values_" + key, db, value_type=int),
+        '_unstake_heights': lambda key, db: QueueDB("unstake_heights_" + key, db, value_type=int),
 
         # Wallet ID in linked list
-        self._node_id = VarDB("wallet_id_" + str(_address), db, value_type=int)
+        '_node_id': lambda key, db: VarDB("wallet_id_" + key, db, value_type=int),
+
+        # Wallet ID in the linked list of wallets with unresolved join or leave requests
+        '_pending_id': lambda key, db: VarDB("pending_id_" + key, db, value_type=int),
 
-        # Tracking individual wallet's delegations
-        self._delegation_address = ArrayDB("delegation_addr_" + str(_address), db, value_type=Address)
-        self._delegation_value = ArrayDB("delegation_value_" + str(_address), db, value_type=int)
+        # Reward index of the SCORE, when the wallet's rewards were settled the last time
+        '_reward_index': lambda key, db: VarDB("reward_index_" + key, db, value_type=int),
+
+        # Tracking individual wallet's delegations, P-Rep address -> amount
+        '_delegations': lambda key, db: IterableDictDB("delegation_addr_" + key, db, Address, int),
+        # Amounts of the previous layout, in the order of the P-Rep addresses, moved by _migrateDelegations
+        '_legacy_delegation_value': lambda key, db: ArrayDB("delegation_value_" + key, db, value_type=int),
+    }
+
+    def __init__(self, db: IconScoreDatabase, _address: Address):
+        self._db = db
+        self._address = _address
+        self._key = str(_address)
+
+    def __getattr__(self, name):
+        # only called for containers, which were not created yet
+        factory = Wallet._CONTAINERS.get(name)
+        if factory is None:
+            raise AttributeError(name)
+        container = factory(self._key, self._db)
+        setattr(self, name, container)
+        return container
 
     def join(self, _join_amount: int, _delegation: dict, _licx: IconScoreBase):
         """
@@ -35,7 +65,7 @@ class Wallet:
         if len(self._join_values) >= 10:
             revert("LiquidICX: Wallet tries to join more than 10 times in 2 terms. This is considered as spam")
 
-        iiss_info = self.__sys_score.getIISSInfo()
+        iiss_info = _licx._system_score.getIISSInfo()
 
         self._join_values.put(_join_amount)
         self._unlock_heights.put(iiss_info["nextPRepTerm"] + TERM_LENGTH)
@@ -49,10 +79,13 @@ class Wallet:
         if delegation_amount_sum != _join_amount:
             revert("LiquidICX: Delegations values do not match to the amount of ICX sent.")
 
-    def requestLeave(self, _leave_amount):
+        self.addToPendingWallets(_licx)
+
+    def requestLeave(self, _leave_amount, _licx: IconScoreBase):
         """
         Adds a leave amount to the wallet's leave queue.
         :param _leave_amount: Amount of LICX for a leave request
+        :param _licx
         """
 
         if len(self._leave_values) >= 10:
@@ -61,7 +94,9 @@ class Wallet:
         self._leave_values.put(_leave_amount)
         self.unstaking = self.unstaking + _leave_amount
 
-    def leave(self, _licx: IconScoreBase) -> int:
+        self.addToPendingWallets(_licx)
+
+    def leave(self, _licx: IconScoreBase, _delegation_deltas: dict = None) -> int:
         """
         Function resolves a leave request.
         It sum up the value and adds an unstaking period of all un-resolved leave requests.
@@ -70,108 +105,179 @@ class Wallet:
         Let's assume, that sender is delegating 123 ICX(35,76%) to prep_1 and 221 ICX(64,24%) to prep_2.
         User leaving with 150 ICX means, that 53,64 ICX will be subtracted from prep_1 and 96,36 ICX from prep_2.
 
+        :param _licx
+        :param _delegation_deltas: see subtractDelegationsProportionallyToWallet
         :return: Sum of newly resolved leave requests
         """
 
         leave_amount = 0
         if len(self._leave_values) != len(self._unstake_heights):
-            current_height = self.__sys_score.getIISSInfo()["blockHeight"]
-            unstake_period = self.__sys_score.estimateUnstakeLockPeriod()["unstakeLockPeriod"]
+            current_height = _licx._system_score.getIISSInfo()["blockHeight"]
+            unstake_period = _licx._system_score.estimateUnstakeLockPeriod()["unstakeLockPeriod"]
             # add unstaking period
             for it in range(len(self._unstake_heights), len(self._leave_values)):
                 leave_amount += self._leave_values[it]
                 self._unstake_heights.put(current_height + unstake_period + UNSTAKING_MARGIN)
 
-            self.subtractDelegationsProportionallyToWallet(_licx, leave_amount)
+            self.subtractDelegationsProportionallyToWallet(_licx, leave_amount, _delegation_deltas)
 
         return leave_amount
 
-    def unlock(self) -> int:
+    def unlock(self, _licx: IconScoreBase) -> int:
         """
         Unlocks user's LICX and removes entry from the _join_values, _allow_transfer_height
+        :param _licx
         :return: Amount of new unlocked LICX
         """
 
         unlocked = 0
         if self.locked > 0:
-            next_term = self.__sys_score.getIISSInfo()["nextPRepTerm"]
+            next_term = _licx._system_score.getIISSInfo()["nextPRepTerm"]
             while self._unlock_heights:
-                if next_term > self._unlock_heights[0]:  # always check and remove the first element only
-                    self.locked = self.locked - self._join_values[0]
-
-                    unlocked += self._join_values[0]
+                if next_term > self._unlock_heights.peek():  # always check and remove the first element only
+                    join_value = self._join_values.pop_front()
+                    self._unlock_heights.pop_front()
 
-                    Utils.remove_from_array(self._join_values, self._join_values[0])
-                    Utils.remove_from_array(self._unlock_heights, self._unlock_heights[0])
+                    self.locked = self.locked - join_value
+                    unlocked += join_value
                 else:
                     break
         return unlocked
 
-    def claim(self) -> int:
+    def claim(self, _licx: IconScoreBase) -> int:
         """
         Function checks, if the user's unstaking period is over and his is ICX is ready to be claimed.
+        :param _licx
         """
 
         claim_amount = 0
         if len(self._unstake_heights):
-            block_height = self.__sys_score.getIISSInfo()["blockHeight"]
+            block_height = _licx._system_score.getIISSInfo()["blockHeight"]
             while len(self._unstake_heights):
-                if block_height >= self._unstake_heights[0]:
-                    claim_amount = claim_amount + self._leave_values[0]
-                    self.unstaking = self.unstaking - self._leave_values[0]
+                if block_height >= self._unstake_heights.peek():
+                    leave_value = self._leave_values.pop_front()
+                    self._unstake_heights.pop_front()
 
-                    Utils.remove_from_array(self._leave_values, self._leave_values[0])
-                    Utils.remove_from_array(self._unstake_heights, self._unstake_heights[0])
+                    claim_amount = claim_amount + leave_value
+                    self.unstaking = self.unstaking - leave_value
                 else:
                     break
         return claim_amount
 
     def addSingleDelegation(self, _licx: IconScoreBase, _address: str, _value: int):
         prep_address: Address = Address.from_string(_address)
+        self._migrateDelegations()
 
         # If prep_address is already in the wallet's delegation
-        if prep_address in self._delegation_address:
-            index = list(self._delegation_address).index(prep_address)
-            self._delegation_value[index] += _value
-            _licx._delegation[prep_address] += _value
+        if prep_address in self._delegations:
+            self._delegations[prep_address] += _value
         # If prep_address is not yet part of the wallet's delegation
         else:
-            # If prep_address already exists in global licx delegations
-            if prep_address in _licx._delegation_keys:
-                _licx._delegation[prep_address] += _value
-            # Make sure prep_address is actually a prep
-            elif not Utils.isPrep(_licx.db, prep_address):
+            # Make sure prep_address is actually a prep, if it is not part of the global licx delegations
+            if prep_address not in _licx._delegation_keys and not _licx._isPrep(prep_address):
                 revert("LiquidICX: Given address is not a P-Rep.")
+            self._delegations[prep_address] = _value
+        _licx._addDelegation(prep_address, _value)
+
+    def subtractDelegationsProportionallyToWallet(self,
+                                                  _licx: IconScoreBase,
+                                                  _amount: int,
+                                                  _delegation_deltas: dict = None):
+        """
+        Subtracts an amount from the wallet's and the SCORE's delegations, proportionally to the wallet's delegations.
+        :param _licx
+        :param _amount: Amount of LICX to subtract
+        :param _delegation_deltas: If passed, the changes of the SCORE's delegations are summed up per P-Rep in it,
+        instead of being written to _licx._delegation
+        """
+
+        self._migrateDelegations()
+        balance = _licx._balances[self._address]
+        for prep_address, value in self._delegations.items():
+            subtract = int((_amount * Utils.calcBPS(value, balance)) / 10000)
+            value -= subtract
+
+            if _delegation_deltas is None:
+                _licx._subtractDelegation(prep_address, subtract)
+            else:
+                _delegation_deltas[prep_address] = _delegation_deltas.get(prep_address, 0) - subtract
+
+            if value <= 0:
+                del self._delegations[prep_address]
             else:
-                _licx._delegation_keys.put(prep_address)
-                _licx._delegation[prep_address] = _value
-            # Always add to the wallet's array because prep_address is not yet part of the wallet's delegation
-            self._delegation_address.put(prep_address)
-            self._delegation_value.put(_value)
-
-    def subtractDelegationsProportionallyToWallet(self, _licx: IconScoreBase, _amount: int):
-        for i in range(len(self._delegation_address)):
-            basis_point = Utils.calcBPS(self.delegation_value[i], _licx._balances[self._address])
-            subtract = int((_amount * basis_point) / 10000)
-
-            self.delegation_value[i] -= subtract
-            _licx._delegation[self.delegation_address[i]] -= subtract
-
-            if _licx._delegation[self.delegation_address[i]] <= 0:
-                Utils.remove_from_array(_licx._delegation_keys, self.delegation_address[i])
-            if self.delegation_value[i] <= 0:
-                Utils.remove_from_array(self.delegation_address, self.delegation_address[i])
-                Utils.remove_from_array(self.delegation_value, self.delegation_value[i])
-
-    def calcDistributeDelegations(self, _reward: int, _balance: int, _delegations: DictDB):
-        for i in range(len(self._delegation_address)):
-            basis_point = Utils.calcBPS(self._delegation_value[i], _balance)
-            delegation_value = int((_reward * basis_point) / 10000)
-            self._delegation_value[i] += delegation_value
-            _delegations[Address.from_string(self._delegation_address[i])] += delegation_value
+                self._delegations[prep_address] = value
+
+    def calcDistributeDelegations(self,
+                                  _reward: int,
+                                  _balance: int,
+                                  _licx: IconScoreBase,
+                                  _delegation_deltas: dict = None) -> int:
+        """
+        Adds the wallet's rewards to its and the SCORE's delegations, proportionally to the current delegations.
+        :param _delegation_deltas: see subtractDelegationsProportionallyToWallet
+        :return: Sum of the added delegations
+        """
+
+        self._migrateDelegations()
+        added = 0
+        for prep_address, value in self._delegations.items():
+            basis_point = Utils.calcBPS(value, _balance)
+            delegation_value = Utils.calcValueProportionalToBasisPoint(_reward, basis_point)
+            self._delegations[prep_address] = value + delegation_value
+            added += delegation_value
+
+            if _delegation_deltas is None:
+                _licx._addDelegation(prep_address, delegation_value)
+            else:
+                _delegation_deltas[prep_address] = _delegation_deltas.get(prep_address, 0) + delegation_value
+        return added
+
+    def addDelegationValue(self, _prep_address: Address, _value: int):
+        """
+        Adds an amount to the wallet's delegation of a P-Rep. The SCORE's delegations are not changed.
+        """
+
+        self._migrateDelegations()
+        self._delegations[_prep_address] = self._delegations.get(_prep_address, 0) + _value
+
+    def removeDelegations(self) -> list:
+        """
+        Removes all delegations of the wallet. The SCORE's delegations are not changed.
+        :return: the removed (P-Rep address, amount) pairs
+        """
+
+        self._migrateDelegations()
+        delegations = self._delegations.items()
+        self._delegations.clear()
+        return delegations
+
+    def _migrateDelegations(self):
+        """
+        Moves the delegations stored as two arrays by a previous version into the delegation map.
+        """
+
+        if not len(self._legacy_delegation_value):
+            return
+
+        self._delegations.reindex()
+        for prep_address, value in zip(self._delegations.keys(), list(self._legacy_delegation_value)):
+            self._delegations[prep_address] = value
+        while self._legacy_delegation_value:
+            self._legacy_delegation_value.pop()
+
+    def hasPendingRequests(self) -> bool:
+        """
+        Return True if the wallet has join requests, which are not unlocked, or leave requests, which are not resolved
+        """
+
+        return len(self._join_values) > 0 or len(self._leave_values) != len(self._unstake_heights)
+
+    def addToPendingWallets(self, _licx: IconScoreBase):
+        if not self.pending_id:
+            self.pending_id = _licx._addPendingWallet(self._address)
 
     def hasVotingPower(self) -> bool:
-        return len(self.delegation_address) > 0
+        return len(self._delegations) > 0
 
     def exists(self):
         return self.node_id > 0
@@ -193,19 +299,19 @@ class Wallet:
         self._unstaking.set(_value)
 
     @property
-    def join_values(self) -> ArrayDB:
+    def join_values(self) -> QueueDB:
         return self._join_values
 
     @property
-    def leave_values(self) -> ArrayDB:
+    def leave_values(self) -> QueueDB:
         return self._leave_values
 
     @property
-    def unlock_heights(self) -> ArrayDB:
+    def unlock_heights(self) -> QueueDB:
         return self._unlock_heights
 
     @property
-    def unstake_heights(self) -> ArrayDB:
+    def unstake_heights(self) -> QueueDB:
         return self._unstake_heights
 
     @property
@@ -217,14 +323,59 @@ class Wallet:
         self._node_id.set(_value)
 
     @property
-    def delegation_address(self):
-        return self._delegation_address
+    def pending_id(self) -> int:
+        return self._pending_id.get()
+
+    @pending_id.setter
+    def pending_id(self, _value):
+        self._pending_id.set(_value)
+
+    @property
+    def reward_index(self) -> int:
+        return self._reward_index.get()
+
+    @reward_index.setter
+    def reward_index(self, _value):
+        if _value:
+            self._reward_index.set(_value)
+        else:
+            self._reward_index.remove()
 
     @property
-    def delegation_value(self):
-        return self._delegation_value
+    def delegations(self) -> list:
+        """
+        (P-Rep address, amount) pairs of the wallet's delegations
+        """
+
+        if len(self._legacy_delegation_value):
+            return list(zip(self._delegations.keys(), self._legacy_delegation_value))
+        return self._delegations.items()
+
+    def save(self):
+        """
+        Writes the wallet to the storage. Nothing to do here, as every change is written immediately.
+        """
+
+        pass
+
+    def delete(self):
+        """
+        Removes all storage entries of the wallet
+        """
+
+        for var in (self._locked, self._unstaking, self._node_id, self._pending_id, self._reward_index):
+            var.remove()
+        for queue in (self._join_values, self._unlock_heights, self._leave_values, self._unstake_heights):
+            queue.clear()
+        self._migrateDelegations()
+        self._delegations.clear()
+
+    def isEmpty(self) -> bool:
+        return not (self.locked or self.unstaking or self.node_id or self.pending_id or len(self._join_values)
+                    or len(self._leave_values) or len(self._unstake_heights) or len(self._delegations))
 
     def serialize(self) -> dict:
+        delegations = self.delegations
         return {
             "locked": self.locked,
             "join_values": list(self.join_values),
@@ -232,8 +383,8 @@ class Wallet:
             "unstaking": self.unstaking,
             "leave_values": list(self.leave_values),
             "unstake_heights": list(self.unstake_heights),
-            "delegation_addr": list(self.delegation_address),
-            "delegation_values": list(self._delegation_value),
+            "delegation_addr": [address for address, _ in delegations],
+            "delegation_values": [value for _, value in delegations],
         }
 
     @property